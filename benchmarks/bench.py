@@ -0,0 +1,276 @@
+"""
+Reproducible performance benchmarks for mopy.
+
+Measures simulation throughput, game method costs, Dvonn ring removal, tree
+memory per node and parallel search scaling, with fixed seeds and budgets.
+Results are written as JSON, and can be compared against a stored baseline
+to flag regressions.
+
+Usage:
+    python -m benchmarks.bench --output bench.json
+    python -m benchmarks.bench --compare baseline.json --threshold 0.1
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import tracemalloc
+from copy import deepcopy
+from time import perf_counter
+
+from mopy.mopy import Mopy
+from mopy.mctree import MCTree
+from mopy.impl.nim.game import NimGame
+from mopy.impl.dvonn.game import DvonnGame
+from mopy.impl.dvonn.state import Cell
+from mopy.policies import simulation
+
+# Metric names ending in these are better when higher, all others when lower
+HIGHER_IS_BETTER = ("_per_sec",)
+
+SEED = 1234
+
+
+def _best_time(func, repeat):
+    """Best wall time of `repeat` calls of `func`, to reduce noise."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def _random_states(game, num_games):
+    """Every state of `num_games` seeded random games, in order."""
+    random.seed(SEED)
+    states = []
+    for _ in range(num_games):
+        state = game.new_game()
+        while not game.is_over(state):
+            states.append(deepcopy(state))
+            game.do_action(state, game.sample_random_action(state))
+    return states
+
+
+def bench_rollouts(name, game, num_rollouts, repeat):
+    """Complete random games simulated per second from the first turn."""
+    root = MCTree(game, game.new_game())
+
+    def run():
+        random.seed(SEED)
+        for _ in range(num_rollouts):
+            root.simulate_game(simulation.random_action)
+    elapsed = _best_time(run, repeat)
+    return {name + "_rollouts_per_sec": num_rollouts / elapsed}
+
+
+def bench_game_methods(name, game, num_games, repeat):
+    """Mean seconds per do_action and legal action calculation."""
+    states = _random_states(game, num_games)
+    random.seed(SEED)
+    actions = [game.sample_random_action(s) for s in states]
+    copies = [[deepcopy(s) for s in states] for _ in range(repeat)]
+    legal_copies = [[deepcopy(s) for s in states] for _ in range(repeat)]
+    # Games such as Dvonn cache legal actions on their states, so time
+    # calculating them rather than reading the cache
+    calculate = getattr(game, "_calculate_legal_actions",
+                        game.get_legal_actions)
+
+    def legal():
+        for s in legal_copies.pop():
+            calculate(s)
+
+    def do():
+        # Act on fresh copies each repeat, without timing the copies
+        for s, a in zip(copies.pop(), actions):
+            game.do_action(s, a)
+
+    return {
+        name + "_get_legal_actions_sec":
+            _best_time(legal, repeat) / len(states),
+        name + "_do_action_sec": _best_time(do, repeat) / len(states),
+    }
+
+
+def _full_board(game):
+    """Every cell filled, alternating colours, with 3 Dvonn rings."""
+    state = game.new_game()
+    board = state.board
+    for x, row in enumerate(board.grid):
+        for y, cell in enumerate(row):
+            if cell.owner != Cell.Owner.NULL:
+                owner = Cell.Owner.WHITE if y % 2 else Cell.Owner.BLACK
+                board.place_ring(x, y, owner)
+    for x, y in [(2, 0), (3, 5), (0, 9)]:
+        board.grid[x][y].num_white_rings = 0
+        board.grid[x][y].num_black_rings = 0
+        board.grid[x][y].num_dvonn_rings = 1
+        board.grid[x][y].owner = Cell.Owner.RED
+    board.refresh_counters()
+    return board
+
+
+def _split_board(game):
+    """Half of the rings are cut off from every Dvonn ring."""
+    board = _full_board(game)
+    for x in range(len(board.grid)):
+        cell = board.grid[x][6 - x // 2]
+        cell.num_white_rings = cell.num_black_rings = 0
+        cell.num_dvonn_rings = 0
+        cell.owner = Cell.Owner.EMPTY
+    for x, y in [(3, 5), (0, 9)]:
+        board.grid[x][y].num_dvonn_rings = 0
+        board.grid[x][y].num_black_rings = 1
+        board.grid[x][y].owner = Cell.Owner.BLACK
+    board.refresh_counters()
+    return board
+
+
+def bench_ring_removal(repeat, calls=200):
+    """Mean seconds per remove_isolated_rings on fixed Dvonn boards."""
+    game = DvonnGame()
+    metrics = {}
+    for name, make_board in [("full", _full_board), ("split", _split_board)]:
+        boards = [make_board(game) for _ in range(calls * repeat)]
+
+        def run():
+            for _ in range(calls):
+                boards.pop().remove_isolated_rings()
+        metrics["dvonn_remove_rings_%s_sec" % name] = (
+            _best_time(run, repeat) / calls)
+    return metrics
+
+
+def bench_tree_memory(name, game, num_sims):
+    """Bytes held per tree node after a fixed simulation budget."""
+    random.seed(SEED)
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    # Search from a root we keep, so the tree is still alive to measure
+    root = MCTree(game, game.new_game())
+    Mopy()._run_search(root, None, num_sims)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    num_nodes, stack = 0, [root]
+    while stack:
+        node = stack.pop()
+        num_nodes += 1
+        stack.extend(node.children)
+    return {name + "_bytes_per_node": (current - start) / num_nodes}
+
+
+def bench_parallel_scaling(game, num_sims, max_workers):
+    """Simulations per second of parallel_search from 1 to N workers."""
+    metrics = {}
+    for workers in range(1, max_workers + 1):
+        random.seed(SEED)
+        result = Mopy().parallel_search(
+            game, game.new_game(), search_time=None, num_sims=num_sims,
+            num_workers=workers, return_result=True)
+        metrics["parallel_%d_workers_sims_per_sec" % workers] = (
+            result.sims_per_second)
+    return metrics
+
+
+def run_benchmarks(quick=False, max_workers=4):
+    """
+    Run every benchmark.
+
+    Args:
+        quick (bool): Use much smaller budgets, for smoke testing.
+        max_workers (int): Largest number of parallel workers to measure.
+
+    Returns:
+        dict mapping metric names to measured values.
+    """
+    scale = 10 if quick else 1
+    repeat = 2 if quick else 5
+    nim, big_nim = NimGame(), NimGame([100] * 1000)
+    dvonn = DvonnGame()
+
+    metrics = {}
+    metrics.update(bench_rollouts("nim", nim, 5000 // scale, repeat))
+    metrics.update(bench_rollouts("nim_large", big_nim, 20 // scale + 1,
+                                  repeat))
+    metrics.update(bench_rollouts("dvonn", dvonn, 100 // scale, repeat))
+    metrics.update(bench_game_methods("nim", nim, 200 // scale, repeat))
+    metrics.update(bench_game_methods("dvonn", dvonn, 10 // scale, repeat))
+    metrics.update(bench_ring_removal(repeat))
+    metrics.update(bench_tree_memory("nim", NimGame([5, 6, 7, 8]),
+                                     5000 // scale))
+    metrics.update(bench_tree_memory("dvonn", dvonn, 500 // scale))
+    metrics.update(bench_parallel_scaling(dvonn, 400 // scale, max_workers))
+    return metrics
+
+
+def compare(metrics, baseline, threshold):
+    """
+    Find metrics that got worse than a baseline by more than `threshold`.
+
+    Args:
+        metrics (dict[str, float]): Freshly measured metrics.
+        baseline (dict[str, float]): Previously stored metrics.
+        threshold (float): Allowed relative change, such as 0.1 for 10%.
+
+    Returns:
+        list[Tuple(str, float, float, float)] of (name, baseline value,
+        new value, relative change) for every regressed metric. Positive
+        changes are always regressions, whichever way the metric goes.
+    """
+    regressions = []
+    for name, old in sorted(baseline.items()):
+        new = metrics.get(name)
+        if new is None or old == 0:
+            continue
+        change = (new - old) / old
+        if name.endswith(HIGHER_IS_BETTER):
+            change = -change
+        if change > threshold:
+            regressions.append((name, old, new, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", default="bench.json",
+                        help="where to write results (default: bench.json)")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="results file to check for regressions against")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative change counted as a regression")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="largest parallel worker count to measure")
+    parser.add_argument("--quick", action="store_true",
+                        help="run tiny budgets, for smoke testing")
+    args = parser.parse_args(argv)
+
+    metrics = run_benchmarks(args.quick, args.workers)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": SEED,
+        "quick": args.quick,
+        "metrics": metrics,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    for name, value in sorted(metrics.items()):
+        print("%-45s %.6g" % (name, value))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["metrics"]
+        regressions = compare(metrics, baseline, args.threshold)
+        for name, old, new, change in regressions:
+            print("REGRESSION %s: %.6g -> %.6g (%+.1f%%)"
+                  % (name, old, new, 100 * change))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""
+This module pits two Mopy configurations against each other.
+
+An Arena plays many games between two contestants on a process pool,
+alternating who moves first, and keeps running statistics of the match:
+win rates with Wilson confidence intervals, CPU time spent per move, and
+optionally a sequential probability ratio test (SPRT) that stops the match
+as soon as the result is clear.
+"""
+
+import os
+import random
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from math import log, sqrt
+from time import perf_counter as clock
+
+
+GameRecord = namedtuple("GameRecord", [
+    "game_num", "first", "score", "num_moves", "cpu_time", "wall_time"])
+GameRecord.__doc__ = """
+The outcome of one arena game.
+
+first is the index of the contestant who moved first, and score is the
+score of contestant 0 (1 for a win, 0 for a loss). num_moves are the moves
+played by each contestant, which aren't always alternating since players
+may pass, and cpu_time and wall_time are seconds spent searching by each.
+"""
+
+SPRT = namedtuple("SPRT", ["elo0", "elo1", "alpha", "beta"])
+SPRT.__new__.__defaults__ = (0.0, 50.0, 0.05, 0.05)
+SPRT.__doc__ = """
+Sequential probability ratio test of an Elo difference.
+
+Tests the hypothesis that contestant 0 is elo0 stronger than contestant 1
+against the hypothesis that it is elo1 stronger, with false positive and
+false negative rates alpha and beta.
+"""
+
+
+class Contestant(object):
+    """A Mopy configuration and the search budget it plays with."""
+
+    def __init__(self, mopy, name=None, parallel=False, **search_args):
+        """
+        Args:
+            mopy (Mopy): The configured search to play with.
+            name (Optional[str]): Name used in reports. Defaults to None.
+            parallel (Optional[bool]): If True, moves are chosen with
+                `parallel_search` instead of `search`. Defaults to False.
+            **search_args: Keyword arguments given to every search, such as
+                `search_time`, `num_sims` or `num_workers`.
+        """
+        self.mopy = mopy
+        self.name = name
+        self.parallel = parallel
+        self.search_args = search_args
+
+    def choose_action(self, game, state):
+        """Search for the action to play in `state`."""
+        if self.parallel:
+            return self.mopy.parallel_search(game, state, **self.search_args)
+        return self.mopy.search(game, state, **self.search_args)
+
+
+class ArenaStats(object):
+    """Running statistics of a match between two contestants."""
+
+    def __init__(self, sprt=None):
+        """
+        Args:
+            sprt (Optional[SPRT]): Test used to decide when the match can
+                stop. Defaults to None (play every game).
+
+        Attributes:
+            games (int): Games finished so far.
+            wins (int): Games won by contestant 0.
+            losses (int): Games won by contestant 1.
+            draws (int): Games with any other result.
+            cpu_time (list[float]): CPU seconds each contestant searched.
+            num_moves (list[int]): Moves each contestant played.
+        """
+        self.sprt = sprt
+        self.games = 0
+        self.wins = 0
+        self.losses = 0
+        self.draws = 0
+        self.cpu_time = [0.0, 0.0]
+        self.num_moves = [0, 0]
+
+    def add(self, record):
+        """Add the outcome of a finished game."""
+        self.games += 1
+        if record.score == 1:
+            self.wins += 1
+        elif record.score == 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+        for i in range(2):
+            self.cpu_time[i] += record.cpu_time[i]
+            self.num_moves[i] += record.num_moves[i]
+
+    @property
+    def score(self):
+        """Mean score of contestant 0, counting draws as half a win."""
+        if not self.games:
+            return 0.5
+        return (self.wins + 0.5 * self.draws) / self.games
+
+    def interval(self, z=1.96):
+        """
+        Wilson score interval of the score of contestant 0.
+
+        Args:
+            z (Optional[float]): Standard score of the confidence level.
+                Defaults to 1.96 (95% confidence).
+
+        Returns:
+            Tuple(float, float) of the lower and upper bounds.
+        """
+        n = self.games
+        if not n:
+            return 0.0, 1.0
+        p = self.score
+        centre = p + z * z / (2 * n)
+        spread = z * sqrt(p * (1 - p) / n + z * z / (4 * n * n))
+        scale = 1 + z * z / n
+        return (centre - spread) / scale, (centre + spread) / scale
+
+    def cpu_per_move(self):
+        """Mean CPU seconds each contestant spent choosing a move."""
+        return [t / m if m else 0.0
+                for t, m in zip(self.cpu_time, self.num_moves)]
+
+    def llr(self):
+        """
+        Log likelihood ratio of the SPRT hypotheses given the games so far.
+
+        Each game counts as a Bernoulli trial of contestant 0 scoring, with
+        draws split evenly into a half win and a half loss.
+        """
+        p0 = _elo_to_score(self.sprt.elo0)
+        p1 = _elo_to_score(self.sprt.elo1)
+        wins = self.wins + 0.5 * self.draws
+        losses = self.losses + 0.5 * self.draws
+        return wins * log(p1 / p0) + losses * log((1 - p1) / (1 - p0))
+
+    @property
+    def decision(self):
+        """
+        The SPRT decision so far.
+
+        Returns:
+            "H1" if contestant 0 is shown to be elo1 stronger, "H0" if it is
+            shown to be no more than elo0 stronger, or None if the match has
+            to go on (or no test was asked for).
+        """
+        if self.sprt is None:
+            return None
+        llr = self.llr()
+        if llr >= log((1 - self.sprt.beta) / self.sprt.alpha):
+            return "H1"
+        if llr <= log(self.sprt.beta / (1 - self.sprt.alpha)):
+            return "H0"
+        return None
+
+    def __repr__(self):
+        low, high = self.interval()
+        return "+%d -%d =%d score %.3f [%.3f, %.3f]" % (
+            self.wins, self.losses, self.draws, self.score, low, high)
+
+
+class Arena(object):
+    """Plays matches between two contestants in a game."""
+
+    def __init__(self, game, contestants, num_workers=None, seed=0):
+        """
+        Args:
+            game (Game): The game to play.
+            contestants (Tuple(Contestant, Contestant)): Who plays.
+            num_workers (Optional[int]): How many games to play at once.
+                Defaults to None (one per CPU core).
+            seed (Optional[int]): Base random seed. Each game is seeded with
+                `seed` plus its number, so a match is repeatable.
+                Defaults to 0.
+
+        Notes:
+            Contestants using parallel searches start processes of their
+            own, so `num_workers` should be lowered to make room for them.
+        """
+        self.game = game
+        self.contestants = tuple(contestants)
+        self.num_workers = num_workers or os.cpu_count()
+        self.seed = seed
+
+    def play(self, num_games, sprt=None):
+        """
+        Play a match, yielding the result of each game as it finishes.
+
+        Contestant 0 moves first in even numbered games and contestant 1 in
+        odd numbered games. Games finish in any order.
+
+        Args:
+            num_games (int): Most games to play.
+            sprt (Optional[SPRT]): Stop as soon as this test reaches a
+                decision. Defaults to None (play all `num_games`).
+
+        Yields:
+            Tuple(GameRecord, ArenaStats) of every finished game and the
+            statistics of the match so far.
+        """
+        stats = ArenaStats(sprt)
+        pending = set()
+        next_game = 0
+        with ProcessPoolExecutor(self.num_workers) as pool:
+            try:
+                while next_game < num_games or pending:
+                    # Only queue a few games ahead so stopping early is quick
+                    while (next_game < num_games and
+                           len(pending) < 2 * self.num_workers):
+                        pending.add(pool.submit(
+                            play_game, self.game, self.contestants,
+                            next_game, self.seed + next_game))
+                        next_game += 1
+                    done, pending = wait(pending,
+                                         return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record = future.result()
+                        stats.add(record)
+                        yield record, stats
+                    if stats.decision is not None:
+                        break
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def run(self, num_games, sprt=None, callback=None):
+        """
+        Play a whole match.
+
+        Args:
+            num_games (int): Most games to play.
+            sprt (Optional[SPRT]): Stop as soon as this test reaches a
+                decision. Defaults to None (play all `num_games`).
+            callback (Optional[function(GameRecord, ArenaStats)]): Called
+                after every game, to report progress.
+
+        Returns:
+            ArenaStats of the finished match.
+        """
+        stats = ArenaStats(sprt)
+        for record, stats in self.play(num_games, sprt):
+            if callback is not None:
+                callback(record, stats)
+        return stats
+
+
+def play_game(game, contestants, game_num, seed=None):
+    """
+    Play one game between two contestants.
+
+    Args:
+        game (Game): The game to play.
+        contestants (Tuple(Contestant, Contestant)): Who plays.
+        game_num (int): Number of the game in its match. Contestant 0 moves
+            first in even numbered games.
+        seed (Optional[int]): Random seed for the game. Defaults to None.
+
+    Returns:
+        GameRecord of the finished game.
+    """
+    random.seed(seed)
+    first = game_num % 2
+    state = game.new_game()
+    cpu_time, wall_time = [0.0, 0.0], [0.0, 0.0]
+    num_moves = [0, 0]
+    while not game.is_over(state):
+        i = first if state.current_player == 0 else 1 - first
+        cpu_start, wall_start = _cpu_clock(), clock()
+        action = contestants[i].choose_action(game, state)
+        cpu_time[i] += _cpu_clock() - cpu_start
+        wall_time[i] += clock() - wall_start
+        game.do_action(state, action)
+        num_moves[i] += 1
+
+    # Results are the winning chance of player 1 (the second to move)
+    result = game.get_result(state)
+    score = result if first == 1 else 1 - result
+    return GameRecord(game_num, first, score, tuple(num_moves),
+                      tuple(cpu_time), tuple(wall_time))
+
+
+def _cpu_clock():
+    """CPU seconds used by this process and its finished children."""
+    user, system, children_user, children_system, _ = os.times()
+    return user + system + children_user + children_system
+
+
+def _elo_to_score(elo):
+    """Expected score of a player `elo` points stronger than its opponent."""
+    return 1 / (1 + 10 ** (-elo / 400))
@@ -0,0 +1,117 @@
+"""
+Contains the abstract base class for batched games.
+
+A batched game plays many independent games at once. Each batch stores one
+row per game in NumPy arrays, so random playouts can be run with vectorized
+operations instead of one Python-level action at a time. This is optional;
+any Game can be searched without a matching BatchGame. See Mopy.batch_search
+for how batched games are incorporated.
+"""
+
+from abc import ABCMeta, abstractmethod
+
+
+class BatchGame(object):
+    """
+    Represents many independent games played simultaneously. Implementations
+    should subclass from BatchGame and define the appropriate methods.
+
+    Masks passed to and returned from a BatchGame are 1D NumPy boolean arrays
+    with one element per game (row) in the batch.
+    """
+
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def __init__(self):
+        pass
+
+    @abstractmethod
+    def encode_states(self, states):
+        """
+        Convert states of the matching Game into a batch.
+
+        Args:
+            states (list[State]): The states to encode, one row per state.
+                States are not modified.
+
+        Returns:
+            Batch holding a copy of every state in `states`, in order.
+        """
+        pass
+
+    @abstractmethod
+    def is_over(self, batch):
+        """
+        Determine which games in the batch are complete.
+
+        Args:
+            batch (Batch): The batch of games we're playing.
+
+        Returns:
+            Boolean mask that is True for every completed game.
+        """
+        pass
+
+    @abstractmethod
+    def sample_random_actions(self, batch, active):
+        """
+        Choose a legal action uniformly at random for every active game.
+
+        Args:
+            batch (Batch): The batch of games we're playing.
+            active (ndarray): Boolean mask of games that need an action.
+                Every active game must not be complete.
+
+        Returns:
+            Actions in whatever array form `do_actions` accepts. Entries
+            for inactive games are ignored.
+        """
+        pass
+
+    @abstractmethod
+    def do_actions(self, batch, actions, active):
+        """
+        Execute one action in every active game of the batch.
+
+        Args:
+            batch (Batch): The batch of games we're playing. Modified in place.
+            actions: Actions as returned by `sample_random_actions`.
+            active (ndarray): Boolean mask of games to apply actions to.
+        """
+        pass
+
+    @abstractmethod
+    def get_results(self, batch):
+        """
+        Get the results of a batch of completed games.
+
+        Args:
+            batch (Batch): The batch of games we're playing.
+
+        Returns:
+            Integer array with the zero-indexed player number of the winner
+            of every game in the batch.
+
+        Notes:
+            This should only be called once every game is complete.
+        """
+        pass
+
+    def simulate(self, batch):
+        """
+        Play every game in `batch` to completion with random actions.
+
+        Args:
+            batch (Batch): The batch of games to play. Modified in place.
+
+        Returns:
+            Integer array with the zero-indexed player number of the winner
+            of every game in the batch.
+        """
+        active = ~self.is_over(batch)
+        while active.any():
+            actions = self.sample_random_actions(batch, active)
+            self.do_actions(batch, actions, active)
+            active &= ~self.is_over(batch)
+        return self.get_results(batch)
@@ -0,0 +1,163 @@
+"""
+This module is responsible for opening books of searched positions.
+
+An OpeningBook maps canonical positions (see Game.get_canonical_key) to the
+root statistics of long searches from them. Mopy can answer book positions
+instantly or start its tree from the book statistics. Books are built
+offline with `build_book`, which searches the most promising lines of play
+from the start of a game on a process pool.
+"""
+
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from operator import itemgetter
+
+MAGIC = b"MOPYBOOK"
+ENTRY_HEADER = struct.Struct("<HH")
+ACTION_STATS = struct.Struct("<qdd")
+
+
+class OpeningBook(object):
+    """Search statistics of positions, shared by all equivalent positions."""
+
+    def __init__(self):
+        """
+        Attributes:
+            entries (dict[key, list[Tuple(int, float, float)]]): Maps
+                canonical keys to (action id, visits, wins) of each action
+                searched from the canonical position, most visited first.
+        """
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, game, state, children):
+        """
+        Record the root statistics of a search from `state`.
+
+        Args:
+            game (Game): The game that was searched. It must implement
+                `get_action_from_id`.
+            state (State): The state that was searched from.
+            children (list[ActionStats]): Statistics of each action from
+                `state`, such as SearchResult.children.
+        """
+        key, symmetry = game.get_canonical_key(state)
+        stats = [(game.get_action_id(game.transform_action(c.action,
+                                                           symmetry)),
+                  c.visits, c.wins)
+                 for c in children]
+        stats.sort(key=itemgetter(1), reverse=True)
+        self.entries[key] = stats
+
+    def lookup(self, game, state):
+        """
+        Find the book statistics of `state`.
+
+        Returns:
+            list[Tuple(Action, float, float)] of (action, visits, wins) of
+            each booked action, mapped into `state`, most visited first.
+            None if `state` is not in the book.
+        """
+        key, symmetry = game.get_canonical_key(state)
+        stats = self.entries.get(key)
+        if stats is None:
+            return None
+        return [(game.transform_action(game.get_action_from_id(action_id),
+                                       symmetry, inverse=True),
+                 visits, wins)
+                for action_id, visits, wins in stats]
+
+    def save(self, path):
+        """Write the book into the file at `path`."""
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            for key, stats in self.entries.items():
+                f.write(ENTRY_HEADER.pack(len(key), len(stats)))
+                f.write(key)
+                for entry in stats:
+                    f.write(ACTION_STATS.pack(*entry))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a book saved at `path`.
+
+        Keys are read back as bytes, so only books of games whose canonical
+        keys are bytes (such as Dvonn's) can be saved and loaded.
+        """
+        book = cls()
+        with open(path, "rb") as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            raise ValueError("Not a mopy opening book!")
+        offset = len(MAGIC)
+        while offset < len(data):
+            key_size, num_stats = ENTRY_HEADER.unpack_from(data, offset)
+            offset += ENTRY_HEADER.size
+            key = data[offset:offset + key_size]
+            offset += key_size
+            stats = []
+            for _ in range(num_stats):
+                stats.append(ACTION_STATS.unpack_from(data, offset))
+                offset += ACTION_STATS.size
+            book.entries[key] = stats
+        return book
+
+
+def build_book(game, mopy, num_plies, breadth=2, num_workers=None,
+               book=None, **search_args):
+    """
+    Build an opening book by searching positions from the start of a game.
+
+    Positions are searched one ply at a time, all positions of a ply at
+    once on a process pool. From every searched position the `breadth`
+    most visited actions lead to the positions of the next ply. Equivalent
+    positions are only searched once.
+
+    Args:
+        game (Game): The game to build a book for.
+        mopy (Mopy): The configured search to use.
+        num_plies (int): How many plies from the start of the game to book.
+        breadth (Optional[int]): How many actions to follow from each
+            position. Defaults to 2.
+        num_workers (Optional[int]): How many positions to search at once.
+            Defaults to None (one per CPU core).
+        book (Optional[OpeningBook]): Book to add positions to, skipping
+            those already in it. Defaults to None (a new book).
+        **search_args: Keyword arguments of every `Mopy.search`, such as
+            `search_time` or `num_sims`.
+
+    Returns:
+        OpeningBook of every searched position.
+    """
+    book = OpeningBook() if book is None else book
+    frontier = [game.new_game()]
+    with ProcessPoolExecutor(num_workers) as pool:
+        for _ in range(num_plies):
+            states, keys = [], set()
+            for state in frontier:
+                key, _ = game.get_canonical_key(state)
+                if key not in keys and not game.is_over(state):
+                    keys.add(key)
+                    states.append((key, state))
+            jobs = [pool.submit(_search_position, mopy, game, s, search_args)
+                    for key, s in states if key not in book.entries]
+            for job in jobs:
+                book.add(game, *job.result())
+
+            frontier = []
+            for _, state in states:
+                for action, _, _ in book.lookup(game, state)[:breadth]:
+                    next_state = deepcopy(state)
+                    game.do_action(next_state, action)
+                    frontier.append(next_state)
+    return book
+
+
+def _search_position(mopy, game, state, search_args):
+    """Search `state`, returning it with the root statistics."""
+    result = mopy.search(game, state, return_result=True, **search_args)
+    return state, result.children
@@ -0,0 +1,120 @@
+"""
+This module is responsible for caching search results of repeated positions.
+
+A SearchCache remembers the root statistics of searches, keyed by the
+canonical key of the searched state (see Game.get_canonical_key) and the
+configuration of the search. Mopy answers positions from the cache once
+enough simulations back them, or keeps adding to their statistics every
+time they are searched again.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+
+
+class SearchCache(object):
+    """Thread safe LRU cache of root statistics of searches."""
+
+    def __init__(self, max_size=10000, min_sims=0, accumulate=False):
+        """
+        Args:
+            max_size (Optional[int]): Most positions to remember. The least
+                recently used position is dropped to make room for a new
+                one. Defaults to 10000.
+            min_sims (Optional[int]): Fewest simulations a cached position
+                needs before Mopy answers it without searching. Defaults to
+                0 (always trust cached results).
+            accumulate (Optional[bool]): If True, cached positions are
+                searched again every time, starting from the cached
+                statistics, and the new simulations are added to them.
+                Defaults to False (replace entries by later searches).
+
+        Attributes:
+            hits (int): Lookups that found a cached position.
+            misses (int): Lookups that did not.
+        """
+        self.max_size = max_size
+        self.min_sims = min_sims
+        self.accumulate = accumulate
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        # Locks can't be pickled, so every copy gets its own
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def get(self, game, state, config=None):
+        """
+        Find the cached statistics of `state`.
+
+        Args:
+            game (Game): The game that was searched.
+            state (State): The state to search from.
+            config (Optional[hashable]): Configuration of the search, since
+                different searches give different statistics. Defaults to
+                None.
+
+        Returns:
+            list[Tuple(Action, float, float)] of (action, visits, wins) of
+            each cached action, mapped into `state`. None on a miss.
+        """
+        key, symmetry = game.get_canonical_key(state)
+        with self._lock:
+            stats = self._entries.get((key, config))
+            if stats is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((key, config))
+            self.hits += 1
+        return [(game.transform_action(a, symmetry, inverse=True), v, w)
+                for a, v, w in stats]
+
+    def put(self, game, state, stats, config=None):
+        """
+        Cache the statistics of a search from `state`.
+
+        Args:
+            game (Game): The game that was searched.
+            state (State): The state that was searched from.
+            stats (list[Tuple(Action, float, float)]): The (action, visits,
+                wins) of each searched action. When accumulating, these are
+                the simulations added by the latest search, and are added to
+                whatever was cached in the meantime.
+            config (Optional[hashable]): Configuration of the search.
+                Defaults to None.
+        """
+        key, symmetry = game.get_canonical_key(state)
+        stats = [(game.transform_action(a, symmetry), v, w)
+                 for a, v, w in stats]
+        with self._lock:
+            old_stats = self._entries.pop((key, config), None)
+            if self.accumulate and old_stats is not None:
+                totals = OrderedDict((a, [v, w]) for a, v, w in old_stats)
+                for a, v, w in stats:
+                    total = totals.setdefault(a, [0, 0])
+                    total[0] += v
+                    total[1] += w
+                stats = [(a, v, w) for a, (v, w) in totals.items()]
+            self._entries[(key, config)] = stats
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def is_trusted(self, stats):
+        """Whether cached `stats` have enough simulations to be answered."""
+        return sum(v for _, v, _ in stats) >= self.min_sims
+
+    def clear(self):
+        """Forget every cached position."""
+        with self._lock:
+            self._entries.clear()
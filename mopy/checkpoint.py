@@ -0,0 +1,79 @@
+"""
+This module is responsible for checkpointing long searches to disk.
+
+A Checkpointer snapshots the search tree in the compact format of
+mopy.serialization at regular intervals. Only taking the snapshot happens in
+the search loop; writing it out happens in a background thread, so the
+search never waits on the disk. Files are replaced atomically, so a crash
+mid write leaves the previous checkpoint intact.
+"""
+
+import os
+import threading
+from time import perf_counter as clock
+from mopy import serialization
+
+
+class Checkpointer(object):
+    """Saves a search tree to a file every so often."""
+
+    def __init__(self, path, interval=60.0):
+        """
+        Args:
+            path (str): The file to save checkpoints to.
+            interval (Optional[float]): Seconds between checkpoints.
+                Defaults to 60.
+
+        Attributes:
+            num_saved (int): How many checkpoints were written so far.
+                Checkpoints are written in the background, so this is only
+                up to date once `close` returns.
+        """
+        self.path = path
+        self.interval = interval
+        self.num_saved = 0
+        self._last_save = clock()
+        self._writer = None
+
+    def maybe_save(self, root):
+        """Snapshot `root` if the interval has passed since the last one."""
+        if clock() - self._last_save >= self.interval:
+            self.save(root)
+
+    def save(self, root):
+        """
+        Snapshot `root`, and write it out in the background.
+
+        If the previous checkpoint is still being written, this one is
+        skipped rather than making the search wait for it.
+        """
+        self._last_save = clock()
+        if self._writer is not None and self._writer.is_alive():
+            return
+        data = serialization.dumps(root)
+        self._writer = threading.Thread(target=self._write, args=(data,),
+                                        daemon=True)
+        self._writer.start()
+
+    def close(self, root=None):
+        """
+        Wait for checkpoints being written.
+
+        Args:
+            root (Optional[MCTree]): If given, save a final checkpoint of
+                `root` first. Defaults to None.
+        """
+        if self._writer is not None:
+            self._writer.join()
+        if root is not None:
+            self.save(root)
+            self._writer.join()
+
+    def _write(self, data):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.num_saved += 1
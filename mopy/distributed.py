@@ -0,0 +1,137 @@
+"""
+This module is responsible for searching across hosts over TCP.
+
+Each host runs worker daemons (one per core) that accept search jobs and
+reply with the root statistics of their search (see
+mopy.serialization.dumps_root_actions). A coordinator sends the same job to
+every worker at once and combines the replies, like root parallel
+`Mopy.parallel_search`.
+
+Jobs and replies are pickled, so workers must only be reachable by trusted
+coordinators, and coordinators must only use trusted workers.
+Start a worker with:
+
+    python -m mopy.distributed --host 0.0.0.0 --port 5100
+"""
+
+import argparse
+import pickle
+import socket
+import socketserver
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from mopy import serialization
+
+LENGTH = struct.Struct("!Q")
+# Seconds to wait for workers searching with a simulation budget only
+SIMS_TIMEOUT = 60.0
+
+
+class WorkerServer(socketserver.TCPServer):
+    """A worker daemon running one search job at a time."""
+
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0):
+        """
+        Listen for jobs on (`host`, `port`).
+
+        Args:
+            host (Optional[str]): Interface to listen on. Defaults to the
+                loopback interface only.
+            port (Optional[int]): Port to listen on. Defaults to 0 (any free
+                port, see `server_address`).
+        """
+        super().__init__((host, port), _JobHandler)
+
+
+class _JobHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        try:
+            mopy, game, state, search_time, num_sims = pickle.loads(
+                recv_message(self.request))
+        except (ConnectionError, EOFError):
+            return
+        root = mopy._new_root(game, state)
+        mopy._run_search(root, search_time, num_sims)
+        send_message(self.request, pickle.dumps(
+            serialization.dumps_root_actions(root)))
+
+
+def send_message(sock, data):
+    """Send `data` prefixed by its length."""
+    sock.sendall(LENGTH.pack(len(data)) + data)
+
+
+def recv_message(sock):
+    """Receive data sent by `send_message`."""
+    size, = LENGTH.unpack(_recv_exactly(sock, LENGTH.size))
+    return _recv_exactly(sock, size)
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed mid message!")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def run_job(address, job, timeout):
+    """
+    Run a pickled search job on the worker at `address`.
+
+    Returns:
+        bytes of the pickled root actions of the worker's search.
+
+    Raises:
+        OSError if the worker can't be reached, drops the connection or
+        takes longer than `timeout` seconds for any step.
+    """
+    with socket.create_connection(address, timeout) as sock:
+        send_message(sock, job)
+        return recv_message(sock)
+
+
+def collect_roots(mopy, game, state, workers, search_time, num_sims,
+                  timeout):
+    """
+    Send a search job to every worker at once, and gather their replies.
+
+    Workers that fail or time out are left out.
+
+    Returns:
+        list of the root actions of each worker that replied, as returned
+        by serialization.dumps_root_actions.
+    """
+    job = pickle.dumps((mopy, game, state, search_time, num_sims))
+    with ThreadPoolExecutor(len(workers)) as pool:
+        futures = [pool.submit(run_job, address, job, timeout)
+                   for address in workers]
+    roots = []
+    for future in futures:
+        try:
+            roots.append(pickle.loads(future.result()))
+        except OSError:
+            continue
+    return roots
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a mopy search worker.")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="interface to listen on")
+    parser.add_argument("--port", type=int, default=5100,
+                        help="port to listen on")
+    args = parser.parse_args(argv)
+    with WorkerServer(args.host, args.port) as server:
+        print("Searching jobs on %s:%d" % server.server_address)
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 """Contains the abstract base class for a game."""
 
+import pickle
 from abc import ABCMeta, abstractmethod
+from copy import deepcopy
+from random import choice
 
 
 class Game(object):
@@ -81,3 +84,133 @@ class Game(object):
             unexpected behaviour otherwise during MCTS.
         """
         pass
+
+    def evaluate(self, state):
+        """
+        Estimate the result of a game that isn't complete yet.
+
+        Args:
+            state (State): The current state of the game we're playing.
+
+        Returns:
+            float between 0 and 1 which estimates the expected result of the
+            game from `state`, on the same scale as `get_result`. That is,
+            0 if player 1 (0) surely wins and 1 if player 2 (1) surely wins.
+
+        Notes:
+            Used to score simulations which are cut off before the game is
+            complete. Only two player games can be estimated this way.
+            Defaults to playing a random game out from a copy of `state`,
+            and returning its winner like `get_result` does, which works
+            for any number of players.
+        """
+        state = deepcopy(state)
+        while not self.is_over(state):
+            self.do_action(state, self.sample_random_action(state))
+        return self.get_result(state)
+
+    def sample_random_action(self, state):
+        """
+        Choose a legal action from `state` uniformly at random.
+
+        Args:
+            state (State): The current state of the game we're playing.
+
+        Returns:
+            Action chosen uniformly at random from the legal actions
+            of `state`.
+
+        Notes:
+            This is used by the default simulation policy. The default
+            implementation builds the full list of legal actions, so games
+            with large action spaces should override it with something
+            that doesn't.
+        """
+        return choice(self.get_legal_actions(state))
+
+    def get_action_id(self, action):
+        """
+        Get a compact integer identifying `action`.
+
+        Args:
+            action (Action): Any action of the game we're playing.
+
+        Returns:
+            int that is equal for two actions if and only if the actions are
+            equal. Used as a key for statistics tables shared across states.
+            Defaults to the hash of `action`, so games should override this
+            with small non-negative integers where they can.
+        """
+        return hash(action)
+
+    def get_action_from_id(self, action_id):
+        """
+        Get the action identified by `action_id`.
+
+        Args:
+            action_id (int): An id returned by `get_action_id`.
+
+        Returns:
+            Action whose id is `action_id`.
+
+        Notes:
+            Games must implement this to load saved search trees and
+            opening books, which only store action ids. Parallel and
+            distributed searches send pickled actions without it.
+        """
+        raise NotImplementedError
+
+    def get_distinct_actions(self, state):
+        """
+        Collect legal actions from `state`, keeping one per equivalence class.
+
+        Args:
+            state (State): The current state of the game we're playing.
+
+        Returns:
+            list[Action] of legal actions where no two actions lead to
+            positions that are equivalent under a symmetry of the game.
+            The list is always a new list that may be modified.
+
+        Notes:
+            MCTree expands nodes with these actions, so equivalent children
+            are merged into one. Defaults to all legal actions.
+        """
+        return list(self.get_legal_actions(state))
+
+    def get_canonical_key(self, state):
+        """
+        Get a key that is equal for all states equivalent to `state`.
+
+        Args:
+            state (State): The current state of the game we're playing.
+
+        Returns:
+            Tuple(key, symmetry) where key is a hashable canonical form of
+            `state` and symmetry is the transformation taking `state` to
+            its canonical form. Pass symmetry to `transform_action` to map
+            actions from `state` into the canonical position.
+
+        Notes:
+            Caches, opening books and pondering use this to recognise
+            positions. Defaults to the pickled `state` without a symmetry,
+            which only matches states that pickle the same, so games with
+            symmetries should override this.
+        """
+        return pickle.dumps(state), None
+
+    def transform_action(self, action, symmetry, inverse=False):
+        """
+        Map an action through a symmetry returned by `get_canonical_key`.
+
+        Args:
+            action (Action): An action legal in the untransformed state.
+            symmetry: The transformation to apply.
+            inverse (Optional[bool]): Map an action of the transformed state
+                back to the untransformed state instead. Defaults to False.
+
+        Returns:
+            Action equivalent to `action` in the transformed state. Defaults
+            to `action` itself, for games without symmetries.
+        """
+        return action
@@ -0,0 +1,47 @@
+"""
+This module builds opening books of the Dvonn placement phase.
+
+The first plies of Dvonn only place rings, and the empty board has every
+symmetry, so a small book covers many games. Run it offline with long
+searches, for example:
+
+    python -m mopy.impl.dvonn.book dvonn.book --plies 4 --search-time 30
+
+and pass `OpeningBook.load("dvonn.book")` to Mopy as its book.
+"""
+
+import argparse
+import os
+from mopy.mopy import Mopy
+from mopy.book import OpeningBook, build_book
+from mopy.impl.dvonn.game import DvonnGame
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build an opening book of Dvonn placements.")
+    parser.add_argument("path", help="book file to write, or extend")
+    parser.add_argument("--plies", type=int, default=4,
+                        help="placement plies to book (at most 49)")
+    parser.add_argument("--breadth", type=int, default=2,
+                        help="actions followed from every position")
+    parser.add_argument("--search-time", type=float, default=10.0,
+                        help="seconds searched per position")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="positions searched at once")
+    args = parser.parse_args(argv)
+
+    game = DvonnGame()
+    book = None
+    if os.path.exists(args.path):
+        book = OpeningBook.load(args.path)
+    # Only placement positions are booked, moves depend on all of them
+    num_plies = min(args.plies, game.new_game().board.num_cells)
+    book = build_book(game, Mopy(), num_plies, args.breadth, args.workers,
+                      book, search_time=args.search_time)
+    book.save(args.path)
+    print("Booked %d positions into %s" % (len(book), args.path))
+
+
+if __name__ == "__main__":
+    main()
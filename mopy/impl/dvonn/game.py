@@ -5,19 +5,35 @@ See: http://www.gipf.com/dvonn/rules/rules.html
 for more information about Dvonn and its ruleset.
 """
 
+from math import exp
 from mopy.game import Game
-from mopy.impl.dvonn.state import DvonnState, Cell
+from mopy.impl.dvonn.state import DvonnState, Board, Cell, Symmetry
 from mopy.impl.dvonn.action import DvonnAction
 
 
 class DvonnGame(Game):
 
-    def __init__(self):
-        pass
+    # Weights of controlled rings, mobility and Dvonn adjacency in evaluate
+    EVAL_WEIGHTS = (1.0, 0.25, 0.5)
+    # How many points of weighted difference make a 73% winning chance
+    EVAL_SCALE = 5.0
+
+    def __init__(self, num_rows=Board.NUM_ROWS, num_cols=Board.NUM_COLS):
+        """
+        Set up a game of Dvonn.
+
+        Args:
+            num_rows (Optional[int]): Number of rows of the hexagonal board.
+                Must be odd. Defaults to 5, the standard Dvonn board.
+            num_cols (Optional[int]): Number of cells in the middle row.
+                Defaults to 11, the standard Dvonn board.
+        """
+        self.num_rows = num_rows
+        self.num_cols = num_cols
 
     def new_game(self):
         """Returns a DvonnState right before White's first move."""
-        s = DvonnState()
+        s = DvonnState(num_rows=self.num_rows, num_cols=self.num_cols)
         s.legal_actions = self._calculate_legal_actions(s)
         return s
 
@@ -39,11 +55,41 @@ class DvonnGame(Game):
         if not done:
             raise Exception("Game is not done yet!")
 
-        rings = self._get_total_rings(state)
+        rings = state.board.controlled_rings
         if rings[0] > rings[1]:
             return 0
         return 1
 
+    def evaluate(self, state):
+        """
+        Estimate the winner with a heuristic on the current board.
+
+        Each player is scored by the rings they control (what decides the
+        game), how many moves their stacks have (stacks that can't move
+        are stuck), and how many of their rings sit next to a Dvonn ring
+        (those can't be cut off and removed). The weighted difference of
+        the scores is squashed into a winning chance for Black.
+        """
+        board = state.board
+        grid = board.grid
+        mobility, adjacency = [0, 0], [0, 0]
+        for x, y in board.occupied:
+            cell = grid[x][y]
+            player = cell.player_num
+            if player is None:
+                continue
+            if not board.is_surrounded(cell):
+                mobility[player] += len(board.move_ends(cell))
+            for n_x, n_y in board.neighbour_positions(x, y):
+                if grid[n_x][n_y].has_dvonn_ring:
+                    adjacency[player] += cell.num_rings
+                    break
+
+        features = (board.controlled_rings, mobility, adjacency)
+        score = sum(w * (f[0] - f[1])
+                    for w, f in zip(DvonnGame.EVAL_WEIGHTS, features))
+        return 1 / (1 + exp(score / DvonnGame.EVAL_SCALE))
+
     def get_legal_actions(self, state):
         """
         Get legal actions for `state`.
@@ -53,95 +99,86 @@ class DvonnGame(Game):
         """
         return state.legal_actions
 
-    def _calculate_legal_actions(self, state):
-        """
-        Get all legal actions in the current board state.
-        Note that often one player will not be able to move, even
-        though it is technically their turn. In this case, they must pass
-        their turn on to the next player.
+    def get_action_id(self, action):
         """
-        player = state.players[state.current_player]
-        if player.num_player_rings > 0:
-            return self._get_legal_place_actions(state)
-        move_actions = self._get_legal_move_actions(state)
-        # Current player passes
-        if not move_actions:
-            state.current_player = (state.current_player + 1) % 2
-            return self._get_legal_move_actions(state)
-        return move_actions
+        Number actions by their grid positions.
 
-    def _get_legal_move_actions(self, state):
+        Place actions are numbered by their cell, from 0 to the number of
+        grid cells. Move actions follow, numbered by start then end cell.
         """
-        Get all legal move actions in the current board state.
-        Note a move action is legal if and only if the current
-        player owns the stack they wish to move, that stack
-        is not fully surrounded by other rings, and the stack
-        can only move on top of another stack of rings. Furthermore,
-        a stack may ONLY move adjacent the distance equal to its size.
+        num_cells = self.num_rows * self.num_cols
+        e_x, e_y = action.end
+        action_id = e_x*self.num_cols + e_y
+        if action.type == DvonnAction.Type.MOVE:
+            s_x, s_y = action.start
+            action_id += num_cells * (1 + s_x*self.num_cols + s_y)
+        return action_id
+
+    def get_action_from_id(self, action_id):
+        """Split an id back into cells, the inverse of `get_action_id`."""
+        num_cells = self.num_rows * self.num_cols
+        start, end = divmod(action_id, num_cells)
+        end = divmod(end, self.num_cols)
+        if start == 0:
+            return DvonnAction(DvonnAction.Type.PLACE, end)
+        start = divmod(start - 1, self.num_cols)
+        return DvonnAction(DvonnAction.Type.MOVE, end, start)
+
+    def get_distinct_actions(self, state):
         """
-        actions = []
-        grid = state.board.grid
-        for x, row in enumerate(grid):
-            for y, cell in enumerate(row):
-                if (cell.is_owned_by(state.current_player) and not
-                        state.board.is_surrounded(cell)):
-                    dist = cell.num_rings
-                    neighbours = cell.grid_neighbour_positions(dist)
-                    for n_x, n_y in neighbours:
-                        if (state.board.is_on_board(n_x, n_y) and
-                                grid[n_x][n_y].is_occupied()):
-                            to, fr = (n_x, n_y), (x, y)
-                            a = DvonnAction(DvonnAction.Type.MOVE, to, fr)
-                            actions.append(a)
-        return actions
+        Get legal actions for `state`, merging actions equivalent by symmetry.
 
-    def _get_legal_place_actions(self, state):
+        Only symmetries which leave `state` unchanged can make two actions
+        equivalent. These are common during the placement phase (the empty
+        board has all of them), but rare once rings start moving.
         """
-        Get all legal place actions in the current board state.
-        Note a player can only place a ring on an empty cell.
+        actions = state.legal_actions
+        key = state.encode()
+        stabilizer = [sym for sym in Symmetry
+                      if sym != Symmetry.IDENTITY and state.encode(sym) == key]
+        if not stabilizer:
+            return list(actions)
+
+        distinct, seen = [], set()
+        for a in actions:
+            if a not in seen:
+                distinct.append(a)
+                seen.update(self.transform_action(a, s) for s in stabilizer)
+        return distinct
+
+    def get_canonical_key(self, state):
         """
-        actions = []
-        grid = state.board.grid
-        for x, row in enumerate(grid):
-            for y, cell in enumerate(row):
-                if cell.owner == Cell.Owner.EMPTY:
-                    a = DvonnAction(DvonnAction.Type.PLACE, (x, y))
-                    actions.append(a)
-        return actions
+        Get the smallest encoding of `state` under all board symmetries.
 
-    def _get_total_rings(self, state):
-        white_rings = 0
-        black_rings = 0
-        grid = state.board.grid
-
-        for row in grid:
-            for cell in row:
-                # White owns this
-                if cell.owner == Cell.Owner.WHITE:
-                    white_rings += cell.num_rings
-                # Black owns this
-                elif cell.owner == Cell.Owner.BLACK:
-                    black_rings += cell.num_rings
+        Since every Dvonn symmetry is its own inverse, the returned symmetry
+        maps actions both into and out of the canonical position.
+        """
+        return min(((state.encode(sym), sym) for sym in Symmetry),
+                   key=lambda pair: pair[0])
+
+    def transform_action(self, action, symmetry, inverse=False):
+        """Map the start and end positions of `action` through `symmetry`."""
+        if symmetry is None or symmetry == Symmetry.IDENTITY:
+            return action
+        dims = (self.num_rows, self.num_cols)
+        end = symmetry.apply(*action.end, *dims)
+        start = None
+        if action.start is not None:
+            start = symmetry.apply(*action.start, *dims)
+        return DvonnAction(action.type, end, start)
 
-        return (white_rings, black_rings)
+    def _calculate_legal_actions(self, state):
+        """
+        Get all legal actions in the current board state.
+        Note that often one player will not be able to move, even
+        though it is technically their turn. In this case, they must pass
+        their turn on to the next player.
+        """
+        state.current_player, actions = state.calculate_legal_actions()
+        return actions
 
     def _do_move_action(self, state, end, start):
-        s_x, s_y = start
-        e_x, e_y = end
-        start_cell = state.board.grid[s_x][s_y]
-        end_cell = state.board.grid[e_x][e_y]
-
-        # The stack on the second cell grows
-        end_cell.num_white_rings += start_cell.num_white_rings
-        end_cell.num_black_rings += start_cell.num_black_rings
-        end_cell.num_dvonn_rings += start_cell.num_dvonn_rings
-        end_cell.owner = start_cell.owner
-
-        # All rings move off the first cell
-        start_cell.num_white_rings = 0
-        start_cell.num_black_rings = 0
-        start_cell.num_dvonn_rings = 0
-        start_cell.owner = Cell.Owner.EMPTY
+        state.board.move_stack(start, end)
 
         # Check for components not connected to a red piece
         state.board.remove_isolated_rings()
@@ -150,23 +187,18 @@ class DvonnGame(Game):
 
     def _do_place_action(self, state, pos):
         x, y = pos
-        cell = state.board.grid[x][y]
-        cell.num_white_rings = 1
-        cell.owner = Cell.Owner.WHITE
         player = state.players[state.current_player]
 
         # Initial Dvonn ring placement phase
         if player.num_dvonn_rings > 0:
-            cell.num_white_rings = 0
             player.num_dvonn_rings -= 1
-            cell.owner = Cell.Owner.RED
-            cell.num_dvonn_rings = 1
+            state.board.place_ring(x, y, Cell.Owner.RED)
         else:
             player.num_player_rings -= 1
+            owner = Cell.Owner.WHITE
             if state.current_player == 1:
-                cell.num_white_rings = 0
-                cell.num_black_rings = 1
-                cell.owner = Cell.Owner.BLACK
+                owner = Cell.Owner.BLACK
+            state.board.place_ring(x, y, owner)
 
         next_player = state.players[(state.current_player + 1) % 2]
         # The player who started the first phase also starts the second phase.
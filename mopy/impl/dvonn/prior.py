@@ -0,0 +1,36 @@
+"""This module contains action prior policies for the game Dvonn."""
+
+from mopy.impl.dvonn.action import DvonnAction
+
+
+def dvonn_adjacency(game, state, actions, bonus=3.0):
+    """
+    Policy favouring actions which end next to or on a Dvonn ring.
+
+    Rings touching a Dvonn ring can never be cut off and removed, so placing
+    or moving next to one is usually safer. Moving onto a Dvonn stack takes
+    control of it.
+
+    Args:
+        game (DvonnGame): The game that can operate on actions and states.
+        state (DvonnState): The current state of a Dvonn game.
+        actions (list[DvonnAction]): The actions to weigh.
+        bonus (Optional[float]): Extra weight for favoured actions, relative
+            to the weight of 1 every action gets. Defaults to 3.0.
+
+    Returns:
+        list[float] with one weight for each of `actions`.
+    """
+    board = state.board
+    grid = board.grid
+    weights = []
+    for a in actions:
+        x, y = a.end
+        # The start of a move is emptied, so its rings don't count
+        near_dvonn = any(grid[n_x][n_y].has_dvonn_ring
+                         for n_x, n_y in board.neighbour_positions(x, y)
+                         if (n_x, n_y) != a.start)
+        if a.type == DvonnAction.Type.MOVE and grid[x][y].has_dvonn_ring:
+            near_dvonn = True
+        weights.append(1.0 + bonus*near_dvonn)
+    return weights
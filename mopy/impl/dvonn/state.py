@@ -24,7 +24,10 @@ See: http://www.redblobgames.com/grids/hexagons/
 """
 
 from mopy.state import State
+from mopy.impl.dvonn.action import DvonnAction
 from enum import Enum
+from array import array
+from copy import deepcopy
 
 
 class Cell(object):
@@ -75,6 +78,15 @@ class Cell(object):
     def __eq__(self, other):
         return (self.r == other.r and self.c == other.c)
 
+    @property
+    def player_num(self):
+        """int: Zero-indexed player controlling this cell, or None."""
+        if self.owner == Cell.Owner.WHITE:
+            return 0
+        elif self.owner == Cell.Owner.BLACK:
+            return 1
+        return None
+
     def is_owned_by(self, player_num):
         """Returns True if and only if this cell is owned by `player_num`."""
         if player_num == 0:
@@ -118,31 +130,197 @@ class Cell(object):
         return (c, r + 2)
 
 
+class Symmetry(Enum):
+    """
+    Represents a transformation of the board onto itself.
+
+    The hexagonal Dvonn board is symmetric under a 180 degree rotation and
+    under reflection across its middle row or its middle column. Together
+    with the identity these form a group where every element is its own
+    inverse, so applying a symmetry twice always gives back the original.
+    """
+    IDENTITY = 0
+    ROTATE = 1
+    FLIP_ROWS = 2
+    FLIP_COLS = 3
+
+    def apply(self, x, y, num_rows, num_cols):
+        """
+        Map the grid position (x, y) through this symmetry.
+
+        Args:
+            x (int): Row of the position in grid form.
+            y (int): Column of the position in grid form.
+            num_rows (int): Number of rows of the board grid.
+            num_cols (int): Number of columns of the board grid.
+
+        Returns:
+            Tuple(int, int) of the transformed grid position.
+
+        Notes:
+            Rows above the middle row are padded at their start, and rows
+            below it at their end, so flipping rows also shifts columns
+            by the distance from the middle row.
+        """
+        mid = num_rows // 2
+        if self == Symmetry.ROTATE:
+            return (num_rows - 1 - x, num_cols - 1 - y)
+        elif self == Symmetry.FLIP_ROWS:
+            return (num_rows - 1 - x, x + y - mid)
+        elif self == Symmetry.FLIP_COLS:
+            return (x, num_cols - 1 + mid - x - y)
+        return (x, y)
+
+
 class Board(object):
     """Represents the hexagonal grid of a Dvonn game."""
 
-    def __init__(self):
-        """Set up an empty board, nullifying spaces out of play."""
+    NUM_ROWS = 5
+    NUM_COLS = 11
+
+    # Immediate on-board neighbours of every grid position, shared between
+    # all boards of the same dimensions (and skipped by deepcopy).
+    _neighbour_cache = {}
+
+    def __init__(self, num_rows=NUM_ROWS, num_cols=NUM_COLS):
+        """
+        Set up an empty board, nullifying spaces out of play.
+
+        Args:
+            num_rows (Optional[int]): Number of rows of the hexagonal board.
+                Must be odd. Defaults to 5, the standard Dvonn board.
+            num_cols (Optional[int]): Number of cells in the middle row.
+                Every other row has one cell less than the row next to it
+                towards the middle. Defaults to 11, the standard Dvonn board.
+
+        Attributes:
+            grid (list[list[Cell]]): Every cell of the board in grid form.
+            controlled_rings (list[int]): Running total of rings (of any
+                colour) in stacks controlled by each player.
+            occupied (set[Tuple(int, int)]): Grid positions of every cell
+                with at least one ring on it.
+            removed_white_rings (int): White rings removed from play.
+            removed_black_rings (int): Black rings removed from play.
+
+        Notes:
+            The running totals are kept up to date by `place_ring`,
+            `move_stack` and `remove_isolated_rings`. If cells are modified
+            by hand, call `refresh_counters` afterwards.
+        """
+        mid = num_rows // 2
+        if num_rows % 2 == 0 or num_cols <= mid:
+            raise ValueError("Board must have an odd number of rows and "
+                             "more columns than half of its rows!")
+
         self.grid = []
-        for x in range(5):
+        for x in range(num_rows):
             row = []
-            for y in range(11):
+            for y in range(num_cols):
                 r, c = Cell.grid_to_axial(x, y)
                 row.append(Cell(r, c))
             self.grid.append(row)
 
         # We're "padding" the cells that are out of range of the hexagonal
-        # representation of the grid.
-        self.grid[0][0].owner = Cell.Owner.NULL
-        self.grid[0][1].owner = Cell.Owner.NULL
-        self.grid[1][0].owner = Cell.Owner.NULL
-        self.grid[3][10].owner = Cell.Owner.NULL
-        self.grid[4][9].owner = Cell.Owner.NULL
-        self.grid[4][10].owner = Cell.Owner.NULL
-
+        # representation of the grid. Rows above the middle are padded at
+        # their start and rows below it at their end.
+        for x in range(mid):
+            for y in range(mid - x):
+                self.grid[x][y].owner = Cell.Owner.NULL
+                self.grid[num_rows - 1 - x][num_cols - 1 - y].owner = \
+                    Cell.Owner.NULL
+
+        key = (num_rows, num_cols)
+        if key not in Board._neighbour_cache:
+            Board._neighbour_cache[key] = self._calculate_neighbours()
+
+        # Scratch buffer for graph searches, reused between calls. A cell
+        # counts as visited if its entry equals the current search mark.
+        # It's only made once needed, and copies of the board start without.
+        self._visited = None
+        self._mark = 0
+
+        self.controlled_rings = [0, 0]
+        self.occupied = set()
         self.removed_white_rings = 0
         self.removed_black_rings = 0
 
+    def refresh_counters(self):
+        """Recalculate the running totals from the contents of every cell."""
+        self.controlled_rings = [0, 0]
+        self.occupied = set()
+        for x, row in enumerate(self.grid):
+            for y, cell in enumerate(row):
+                if cell.is_occupied():
+                    self.occupied.add((x, y))
+                    player = cell.player_num
+                    if player is not None:
+                        self.controlled_rings[player] += cell.num_rings
+
+    def place_ring(self, x, y, owner):
+        """
+        Place a single ring on the empty cell at grid position (x, y).
+
+        Args:
+            x (int): Row of the empty cell in grid form.
+            y (int): Column of the empty cell in grid form.
+            owner (Cell.Owner): Colour of the placed ring. Must be WHITE,
+                BLACK or RED.
+        """
+        cell = self.grid[x][y]
+        cell.owner = owner
+        if owner == Cell.Owner.WHITE:
+            cell.num_white_rings = 1
+        elif owner == Cell.Owner.BLACK:
+            cell.num_black_rings = 1
+        else:
+            cell.num_dvonn_rings = 1
+        self.occupied.add((x, y))
+        if cell.player_num is not None:
+            self.controlled_rings[cell.player_num] += 1
+
+    def move_stack(self, start, end):
+        """
+        Move the stack at grid position `start` on top of the one at `end`.
+
+        Args:
+            start (Tuple(int, int)): Grid position of the moving stack.
+            end (Tuple(int, int)): Grid position of the stack moved onto.
+        """
+        s_x, s_y = start
+        e_x, e_y = end
+        start_cell = self.grid[s_x][s_y]
+        end_cell = self.grid[e_x][e_y]
+
+        # Control of the rings below changes hands
+        if end_cell.player_num is not None:
+            self.controlled_rings[end_cell.player_num] -= end_cell.num_rings
+        if start_cell.player_num is not None:
+            self.controlled_rings[start_cell.player_num] += end_cell.num_rings
+
+        # The stack on the second cell grows
+        end_cell.num_white_rings += start_cell.num_white_rings
+        end_cell.num_black_rings += start_cell.num_black_rings
+        end_cell.num_dvonn_rings += start_cell.num_dvonn_rings
+        end_cell.owner = start_cell.owner
+
+        # All rings move off the first cell
+        start_cell.num_white_rings = 0
+        start_cell.num_black_rings = 0
+        start_cell.num_dvonn_rings = 0
+        start_cell.owner = Cell.Owner.EMPTY
+        self.occupied.discard(start)
+
+    @property
+    def num_cells(self):
+        """int: How many cells of the grid are part of the game."""
+        return sum(cell.owner != Cell.Owner.NULL
+                   for row in self.grid for cell in row)
+
+    def neighbour_positions(self, x, y):
+        """Returns the grid positions on the board next to (x, y)."""
+        dims = (len(self.grid), len(self.grid[0]))
+        return Board._neighbour_cache[dims][x][y]
+
     def is_on_board(self, x, y):
         """Returns True if and only if (x, y) is a valid grid board pos."""
         num_rows = len(self.grid)
@@ -159,18 +337,77 @@ class Board(object):
         Dvonn ring, or else it is removed from play. A Dvonn ring is always
         in contact with itself, so they are never removed.
 
-        This algorithm uses DFS to find all connected ring components, and
-        removes components which are considered "isolated" from a Dvonn ring.
+        This algorithm uses an iterative DFS to find all connected ring
+        components, and removes components which are considered "isolated"
+        from a Dvonn ring.
 
         Could be improved in the future by implementing a dynamic connected
         components algorithm.
         """
-        visited = [[False for cell in row] for row in self.grid]
+        if self._visited is None:
+            self._visited = [[0 for cell in row] for row in self.grid]
+        self._mark += 1
+        visited, mark = self._visited, self._mark
+        for x, y in list(self.occupied):
+            cell = self.grid[x][y]
+            if cell.is_occupied() and visited[x][y] != mark:
+                if self._is_isolated_component(x, y, visited, mark):
+                    self._remove_component(x, y)
+
+    def encode(self, symmetry=Symmetry.IDENTITY):
+        """
+        Encode the contents of every cell as bytes.
+
+        Args:
+            symmetry (Optional[Symmetry]): Transformation to apply to the
+                board before encoding. Defaults to the identity.
+
+        Returns:
+            bytes that are equal for two boards if and only if their
+            (transformed) cells hold the same rings.
+        """
+        num_rows, num_cols = len(self.grid), len(self.grid[0])
+        data = array("H")
         for x, row in enumerate(self.grid):
             for y, cell in enumerate(row):
-                if cell.is_occupied() and not visited[x][y]:
-                    if self._is_isolated_component(x, y, visited):
-                        self._remove_component(x, y)
+                # Padding cells are the same on every board
+                if cell.owner == Cell.Owner.NULL:
+                    continue
+                s_x, s_y = symmetry.apply(x, y, num_rows, num_cols)
+                cell = self.grid[s_x][s_y]
+                data.extend((cell.owner.value, cell.num_white_rings,
+                             cell.num_black_rings, cell.num_dvonn_rings))
+        return data.tobytes()
+
+    def __getstate__(self):
+        # Only occupied cells are sent, everything else is rebuilt from them
+        data = array("H")
+        for x, y in self.occupied:
+            cell = self.grid[x][y]
+            data.extend((x, y, cell.owner.value, cell.num_white_rings,
+                         cell.num_black_rings, cell.num_dvonn_rings))
+        return (len(self.grid), len(self.grid[0]), self.removed_white_rings,
+                self.removed_black_rings, data.tobytes())
+
+    def __setstate__(self, state):
+        num_rows, num_cols, removed_white, removed_black, data = state
+        self.__init__(num_rows, num_cols)
+        self.removed_white_rings = removed_white
+        self.removed_black_rings = removed_black
+        values = array("H")
+        values.frombytes(data)
+        owners = list(Cell.Owner)
+        for i in range(0, len(values), 6):
+            x, y, owner, white, black, dvonn = values[i:i + 6]
+            cell = self.grid[x][y]
+            cell.owner = owners[owner - 1]
+            cell.num_white_rings = white
+            cell.num_black_rings = black
+            cell.num_dvonn_rings = dvonn
+            self.occupied.add((x, y))
+            player = cell.player_num
+            if player is not None:
+                self.controlled_rings[player] += cell.num_rings
 
     def is_surrounded(self, cell):
         """
@@ -190,43 +427,108 @@ class Board(object):
                 return False
         return True
 
-    def _is_isolated_component(self, x, y, visited):
-        visited[x][y] = True
-        cell = self.grid[x][y]
-        neighbours = cell.grid_neighbour_positions()
-        is_isolated = (not cell.has_dvonn_ring)
+    def move_ends(self, cell):
+        """Positions the stack on `cell` could move to if it isn't blocked."""
+        grid = self.grid
+        neighbours = cell.grid_neighbour_positions(cell.num_rings)
+        return [(n_x, n_y) for n_x, n_y in neighbours
+                if self.is_on_board(n_x, n_y) and
+                grid[n_x][n_y].is_occupied()]
 
-        for n_x, n_y in neighbours:
-            if self.is_on_board(n_x, n_y) and not visited[n_x][n_y]:
-                neighbour = self.grid[n_x][n_y]
-                if neighbour.is_occupied():
-                    if not self._is_isolated_component(n_x, n_y, visited):
-                        is_isolated = False
+    def move_actions(self, player_num):
+        """
+        Get all legal move actions of `player_num` on the board.
+        Note a move action is legal if and only if the player owns the
+        stack they wish to move, that stack is not fully surrounded by
+        other rings, and the stack can only move on top of another stack
+        of rings. Furthermore, a stack may ONLY move adjacent the distance
+        equal to its size.
+        """
+        actions = []
+        grid = self.grid
+        for x, y in self.occupied:
+            cell = grid[x][y]
+            if cell.is_owned_by(player_num) and not self.is_surrounded(cell):
+                for to in self.move_ends(cell):
+                    a = DvonnAction(DvonnAction.Type.MOVE, to, (x, y))
+                    actions.append(a)
+        return actions
+
+    def place_actions(self):
+        """
+        Get all legal place actions on the board.
+        Note a player can only place a ring on an empty cell.
+        """
+        actions = []
+        for x, row in enumerate(self.grid):
+            for y, cell in enumerate(row):
+                if cell.owner == Cell.Owner.EMPTY:
+                    a = DvonnAction(DvonnAction.Type.PLACE, (x, y))
+                    actions.append(a)
+        return actions
+
+    def _calculate_neighbours(self):
+        neighbours = []
+        for row in self.grid:
+            neighbours.append([
+                tuple((n_x, n_y)
+                      for n_x, n_y in cell.grid_neighbour_positions()
+                      if self.is_on_board(n_x, n_y))
+                for cell in row])
+        return neighbours
+
+    def _is_isolated_component(self, x, y, visited, mark=True):
+        """
+        Mark every ring connected to (x, y) as visited.
+
+        Returns True if and only if none of them is a Dvonn ring. Cells count
+        as visited when their entry in `visited` equals `mark`.
+        """
+        grid = self.grid
+        neighbours = Board._neighbour_cache[(len(grid), len(grid[0]))]
+        is_isolated = True
+        visited[x][y] = mark
+        stack = [(x, y)]
+        while stack:
+            c_x, c_y = stack.pop()
+            if grid[c_x][c_y].has_dvonn_ring:
+                is_isolated = False
+            for n_x, n_y in neighbours[c_x][c_y]:
+                if visited[n_x][n_y] != mark and grid[n_x][n_y].is_occupied():
+                    visited[n_x][n_y] = mark
+                    stack.append((n_x, n_y))
         return is_isolated
 
     def _remove_component(self, x, y):
-        cell = self.grid[x][y]
-        self.removed_white_rings += cell.num_white_rings
-        self.removed_black_rings += cell.num_black_rings
-        cell.owner = Cell.Owner.EMPTY
-        cell.num_white_rings = 0
-        cell.num_black_rings = 0
-        cell.num_dvonn_rings = 0
-        neighbours = cell.grid_neighbour_positions()
-
-        for n_x, n_y in neighbours:
-            if self.is_on_board(n_x, n_y):
-                neighbour = self.grid[n_x][n_y]
-                if neighbour.is_occupied():
-                    self._remove_component(n_x, n_y)
+        grid = self.grid
+        neighbours = Board._neighbour_cache[(len(grid), len(grid[0]))]
+        stack = [(x, y)]
+        while stack:
+            c_x, c_y = stack.pop()
+            cell = grid[c_x][c_y]
+            if not cell.is_occupied():
+                continue
+            self.removed_white_rings += cell.num_white_rings
+            self.removed_black_rings += cell.num_black_rings
+            if cell.player_num is not None:
+                self.controlled_rings[cell.player_num] -= cell.num_rings
+            self.occupied.discard((c_x, c_y))
+            cell.owner = Cell.Owner.EMPTY
+            cell.num_white_rings = 0
+            cell.num_black_rings = 0
+            cell.num_dvonn_rings = 0
+
+            for n_x, n_y in neighbours[c_x][c_y]:
+                if grid[n_x][n_y].is_occupied():
+                    stack.append((n_x, n_y))
 
 
 class Player(object):
     """Wrapper class to store information specific to each player."""
 
-    def __init__(self, player_num):
-        # Each player starts with 23 rings of their colour.
-        self.num_player_rings = 23
+    def __init__(self, player_num, num_player_rings=23):
+        # Each player starts with 23 rings of their colour on a standard board.
+        self.num_player_rings = num_player_rings
         # White starts with 2 Dvonn rings, and Black 1.
         self.num_dvonn_rings = 2
         if player_num == 1:
@@ -236,8 +538,102 @@ class Player(object):
 class DvonnState(State):
     """Represents the full state of a Dvonn game at any time."""
 
-    def __init__(self, current_player=0):
+    def __init__(self, current_player=0, num_rows=Board.NUM_ROWS,
+                 num_cols=Board.NUM_COLS):
+        """
+        Set up the state right before the first placement.
+
+        Args:
+            current_player (Optional[int]): Zero-indexed integer representing
+                the current player. Defaults to White (0).
+            num_rows (Optional[int]): Number of rows of the board. See Board.
+            num_cols (Optional[int]): Number of columns of the board.
+
+        Notes:
+            On custom boards, each player gets an equal share of the cells
+            left after the 3 Dvonn rings. If that share doesn't divide
+            evenly, one cell stays empty after the placement phase.
+        """
         super().__init__(current_player)
         self.legal_actions = []
-        self.board = Board()
-        self.players = [Player(0), Player(1)]
+        self.board = Board(num_rows, num_cols)
+        num_player_rings = (self.board.num_cells - 3) // 2
+        self.players = [Player(0, num_player_rings),
+                        Player(1, num_player_rings)]
+
+    def encode(self, symmetry=Symmetry.IDENTITY):
+        """
+        Encode everything that determines the future of the game as bytes.
+
+        Args:
+            symmetry (Optional[Symmetry]): Transformation to apply to the
+                board before encoding. Defaults to the identity.
+
+        Returns:
+            bytes that are equal for two states if and only if the same
+            actions are legal in both and lead to equivalent results.
+        """
+        header = array("H", [self.current_player])
+        for p in self.players:
+            header.extend((p.num_player_rings, p.num_dvonn_rings))
+        return header.tobytes() + self.board.encode(symmetry)
+
+    def calculate_legal_actions(self):
+        """
+        Calculate the legal actions of the player to move.
+
+        Returns:
+            Tuple(int, list[DvonnAction]) of the player to move and their
+            legal actions. A player who can't move passes their turn, so
+            this is the other player when the current one has no moves.
+        """
+        player = self.players[self.current_player]
+        if player.num_player_rings > 0:
+            return self.current_player, self.board.place_actions()
+        move_actions = self.board.move_actions(self.current_player)
+        # Current player passes
+        if not move_actions:
+            next_player = (self.current_player + 1) % 2
+            return next_player, self.board.move_actions(next_player)
+        return self.current_player, move_actions
+
+    @property
+    def legal_actions(self):
+        """list[DvonnAction]: Legal actions, calculated when first needed."""
+        if self._legal_actions is None:
+            # Players without actions have already passed their turn here
+            _, self._legal_actions = self.calculate_legal_actions()
+        return self._legal_actions
+
+    @legal_actions.setter
+    def legal_actions(self, actions):
+        self._legal_actions = actions
+
+    def __getstate__(self):
+        # Legal actions can be recalculated, so they are never sent
+        return self.current_player, self._player_counts(), self.board
+
+    def __setstate__(self, state):
+        self._restore(*state)
+        self._legal_actions = None
+
+    def __deepcopy__(self, memo):
+        state = DvonnState.__new__(DvonnState)
+        state._restore(self.current_player, self._player_counts(),
+                       deepcopy(self.board, memo))
+        # Actions are never modified, so copies can share them
+        state.legal_actions = list(self.legal_actions)
+        return state
+
+    def _player_counts(self):
+        return tuple((p.num_player_rings, p.num_dvonn_rings)
+                     for p in self.players)
+
+    def _restore(self, current_player, player_counts, board):
+        self.current_player = current_player
+        self.board = board
+        self.players = []
+        for num_player_rings, num_dvonn_rings in player_counts:
+            player = Player(len(self.players), num_player_rings)
+            player.num_dvonn_rings = num_dvonn_rings
+            self.players.append(player)
@@ -0,0 +1,81 @@
+"""This module contains a NumPy batched implementation of the game Nim."""
+
+import numpy as np
+from mopy.batch import BatchGame
+
+
+class NimBatch(object):
+    """Represents many Nim games, one per row."""
+
+    def __init__(self, heaps, current_player):
+        """
+        Create a batch of Nim games.
+
+        Args:
+            heaps (ndarray): 2D integer array where row i holds the heaps
+                of game i.
+            current_player (ndarray): 1D integer array where element i is
+                the zero-indexed player whose turn it is in game i.
+
+        Attributes:
+            remaining (ndarray): Running total of elements left in each game.
+        """
+        self.heaps = heaps
+        self.current_player = current_player
+        self.remaining = heaps.sum(axis=1)
+
+    def __len__(self):
+        return len(self.current_player)
+
+
+class NimBatchGame(BatchGame):
+
+    def __init__(self, seed=None):
+        """
+        Set up a batched Nim game.
+
+        Args:
+            seed (Optional[int]): Seed for the random number generator used
+                to sample actions. Defaults to None (fresh entropy).
+        """
+        self.rng = np.random.default_rng(seed)
+
+    def encode_states(self, states):
+        """Stack the heaps of NimStates into one row per state."""
+        heaps = np.array([s.heaps for s in states], dtype=np.int64)
+        players = np.array([s.current_player for s in states], dtype=np.int8)
+        return NimBatch(heaps.reshape(len(states), -1), players)
+
+    def is_over(self, batch):
+        """Games are only over when all of their heaps are empty."""
+        return batch.remaining == 0
+
+    def sample_random_actions(self, batch, active):
+        """
+        Choose a (heap, amount) pair per game uniformly among legal actions.
+
+        Like NimGame.sample_random_action, we pick a random remaining element
+        and take everything up to and including it from its heap.
+        """
+        remaining = np.where(active, batch.remaining, 1)
+        k = (self.rng.random(len(batch)) * remaining).astype(np.int64)
+        cumulative = batch.heaps.cumsum(axis=1)
+        heap_nums = (cumulative > k[:, None]).argmax(axis=1)
+        rows = np.arange(len(batch))
+        before = cumulative[rows, heap_nums] - batch.heaps[rows, heap_nums]
+        return heap_nums, k - before + 1
+
+    def do_actions(self, batch, actions, active):
+        """Take elements from one heap and advance the player in each game."""
+        heap_nums, num_taken = actions
+        rows = np.flatnonzero(active)
+        taken = num_taken[rows]
+        batch.heaps[rows, heap_nums[rows]] -= taken
+        batch.remaining[rows] -= taken
+        batch.current_player[rows] ^= 1
+
+    def get_results(self, batch):
+        """The winner of each game is the player who moved last."""
+        if not self.is_over(batch).all():
+            raise Exception("Games are not done yet!")
+        return 1 - batch.current_player.astype(np.int64)
@@ -1,6 +1,7 @@
 """This module contains a concrete implementation of the game Nim."""
 
-from random import choice
+from bisect import bisect_right
+from random import randrange
 from mopy.game import Game
 from mopy.impl.nim.state import NimState
 from mopy.impl.nim.action import NimAction
@@ -8,14 +9,25 @@ from mopy.impl.nim.action import NimAction
 
 class NimGame(Game):
 
-    def __init__(self):
-        pass
+    def __init__(self, heaps=None):
+        """
+        Set up a game of Nim.
+
+        Args:
+            heaps (Optional[list[int]]): Sizes of the heaps every new game
+                starts with. Defaults to 3 heaps with 3, 4, and 5 elements.
+        """
+        self.heaps = [3, 4, 5] if heaps is None else list(heaps)
+        # Action ids are numbered heap by heap, for every amount we can take
+        self._id_offsets = [0]
+        for h in self.heaps:
+            self._id_offsets.append(self._id_offsets[-1] + h)
 
     def new_game(self):
         """
-        Initialize a new game with 3 heaps with 3, 4, and 5 elements.
+        Initialize a new game with the heaps given at construction.
 
-        Initial state looks like the following:
+        Default initial state looks like the following:
 
 
         Player 1's move
@@ -28,18 +40,18 @@ class NimGame(Game):
         ----------
         H1  H2  H3
         """
-        heaps = [3, 4, 5]
+        heaps = list(self.heaps)
         current_player = 0
         return NimState(heaps, current_player)
 
     def do_action(self, state, action):
         """Take a non-zero number of elements from a heap."""
-        state.heaps[action.heap_num] -= action.num_taken
+        state.take(action.heap_num, action.num_taken)
         state.current_player = 1 if state.current_player == 0 else 0
 
     def is_over(self, state):
         """Game is only over when all heaps are empty."""
-        return sum(state.heaps) == 0
+        return state.remaining == 0
 
     def get_result(self, state):
         """
@@ -55,7 +67,42 @@ class NimGame(Game):
 
     def get_random_action(self, state):
         """Take a random number of elements from a random heap."""
-        return choice(self.get_legal_actions(state))
+        return self.sample_random_action(state)
+
+    def sample_random_action(self, state):
+        """
+        Choose a legal action uniformly at random in O(log heaps).
+
+        There is exactly one legal action per remaining element: taking
+        n elements from a heap of size h is legal for 1 <= n <= h. Picking
+        a random element and taking up to and including it is therefore
+        uniform over all legal actions, without building them.
+        """
+        heap_num, pos = state.find_heap(randrange(state.remaining))
+        return NimAction(heap_num, pos + 1)
+
+    def get_action_id(self, action):
+        """
+        Number actions from 0, heap by heap, then by amount taken.
+
+        Ids are unique for all actions of games started with `new_game`.
+        """
+        return self._id_offsets[action.heap_num] + action.num_taken - 1
+
+    def get_action_from_id(self, action_id):
+        """Find the heap an id falls in, the inverse of `get_action_id`."""
+        heap_num = bisect_right(self._id_offsets, action_id) - 1
+        num_taken = action_id - self._id_offsets[heap_num] + 1
+        return NimAction(heap_num, num_taken)
+
+    def get_canonical_key(self, state):
+        """
+        Key states by their heaps and player to move.
+
+        Reordering heaps gives an equivalent game, but action ids depend on
+        heap order, so states are only equal to themselves.
+        """
+        return (tuple(state.heaps), state.current_player), None
 
     def get_legal_actions(self, state):
         """
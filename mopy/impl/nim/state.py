@@ -1,5 +1,6 @@
 """This module contains a representation of a state of the game Nim"""
 
+from array import array
 from mopy.state import State
 
 
@@ -17,6 +18,9 @@ class NimState(State):
             current_player (int): Zero-indexed integer representing whose
                 turn it currently is.
 
+        Attributes:
+            remaining (int): Running total of elements left on all heaps.
+
         Example:
             The state NimState([1,2,3], 0) corresponds to:
 
@@ -27,9 +31,67 @@ class NimState(State):
             x   x   x
             ----------
             H1  H2  H3
+
+        Notes:
+            Heaps should only be modified through `take` (or
+            NimGame.do_action) so the running totals stay in sync.
         """
         super().__init__(current_player)
         self.heaps = heaps
+        self.remaining = sum(heaps)
+
+        # Fenwick tree over heap sizes so we can find the heap holding the
+        # k-th remaining element in O(log heaps) for random action sampling.
+        # Built in O(heaps) by pushing each partial sum to its parent.
+        self._tree = [0] + list(heaps)
+        for i in range(1, len(self._tree)):
+            parent = i + (i & -i)
+            if parent < len(self._tree):
+                self._tree[parent] += self._tree[i]
+
+    def take(self, heap_num, num_taken):
+        """Remove `num_taken` elements from heap `heap_num`."""
+        self.heaps[heap_num] -= num_taken
+        self.remaining -= num_taken
+        self._add(heap_num, -num_taken)
+
+    def find_heap(self, k):
+        """
+        Find which heap holds the `k`-th remaining element.
+
+        Args:
+            k (int): Zero-indexed position of an element, counting heaps
+                left to right. Must be between 0 and `remaining` - 1.
+
+        Returns:
+            Tuple(int, int) of the heap index and the zero-indexed position
+            of the element within that heap.
+        """
+        pos = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt < len(self._tree) and self._tree[nxt] <= k:
+                pos = nxt
+                k -= self._tree[nxt]
+            step >>= 1
+        return pos, k
+
+    def _add(self, heap_num, delta):
+        i = heap_num + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def __getstate__(self):
+        # Running totals are rebuilt from the heaps, packed as 64 bit ints
+        return self.current_player, array("Q", self.heaps).tobytes()
+
+    def __setstate__(self, state):
+        current_player, data = state
+        heaps = array("Q")
+        heaps.frombytes(data)
+        self.__init__(heaps.tolist(), current_player)
 
     def __repr__(self):
         heaps = str(self.heaps)
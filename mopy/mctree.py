@@ -1,9 +1,10 @@
 """This module is responsible for node-level operations for MCTS."""
 
 from copy import deepcopy
-from random import choice
+from weakref import ref
+from random import shuffle
 from operator import attrgetter
-from collections import defaultdict
+from collections import defaultdict, Counter
 
 
 class MCTree(object):
@@ -25,21 +26,62 @@ class MCTree(object):
             action (Optional[Action]): The action that was taken to get to
                 `state`. Defaults to None (root node case).
             parent (Optional[MCTree]): Node representing the state from the
-                previous turn. Defaults to None (root node case).
+                previous turn. Defaults to None (root node case). Only a weak
+                reference is kept, so trees have no reference cycles and are
+                freed as soon as their root is dropped.
 
         Attributes:
             children (list[MCTree]): Nodes from taking actions in `state`.
             won_games [float]: How many simulated games won from `state`.
                 Could be a non-whole number depending on chosen backup policy.
             total_games [float]: Number of simulated games done from `state`.
+            amaf_won_games [float]: How many simulated games were won where
+                `action` was played by the same player at any later point
+                after our parent. Used by All-Moves-As-First policies.
+            amaf_total_games [float]: Number of simulated games where
+                `action` was played by the same player after our parent.
+            prior (float): Prior probability that `action` is the best
+                action from our parent's state. None if no prior policy
+                was used.
+            untried_actions (list[Action]): Distinct actions from `state`
+                that have no child yet, in reverse order of expansion.
+                None until the node is first selected through.
+            untried_priors (list[float]): Prior probabilities of each of
+                `untried_actions`. None if no prior policy was used.
         """
         self.game = game
         self.state = state
         self.action = action
-        self.parent = parent
+        self._parent = None if parent is None else ref(parent)
         self.children = []
         self.won_games = 0
         self.total_games = 0
+        self.amaf_won_games = 0
+        self.amaf_total_games = 0
+        self.prior = None
+        self.untried_actions = None
+        self.untried_priors = None
+
+    @property
+    def parent(self):
+        """MCTree: Our parent node, None for roots and dropped parents."""
+        return None if self._parent is None else self._parent()
+
+    @parent.setter
+    def parent(self, parent):
+        self._parent = None if parent is None else ref(parent)
+
+    def __getstate__(self):
+        # Weak references can't be pickled, so children get theirs back
+        # from us when they're unpickled and a pickled node becomes a root
+        state = self.__dict__.copy()
+        state["_parent"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for child in self.children:
+            child._parent = ref(self)
 
     @property
     def win_ratio(self):
@@ -48,7 +90,7 @@ class MCTree(object):
             return 0
         return self.won_games / self.total_games
 
-    def select(self, sel_policy):
+    def select(self, sel_policy, prior_policy=None, widening=None):
         """
         Selection phase for MCTS. Uses appropriate policy.
 
@@ -56,23 +98,54 @@ class MCTree(object):
             sel_policy (function(MCTree) -> MCTree): The policy to be used
                 to select the next node to be expanded. See Mopy for more
                 information.
+            prior_policy (Optional[function(Game, State, list[Action])
+                -> list[float]]): The policy giving prior probabilities of
+                actions, computed once per node. Actions with higher priors
+                are expanded first. Defaults to None (random order).
+            widening (Optional[Tuple(float, float)]): Progressive widening
+                constants (k, alpha). If given, a node visited n times may
+                only have k * n^alpha children (at least one), so nodes are
+                expanded gradually instead of all at once. Defaults to None
+                (expand every action before selecting a child).
 
         Returns:
             MCTree chosen by following `sel_policy` from the current node.
         """
         root = self
         while not root.game.is_over(root.state):
-            num_actions = len(root.game.get_legal_actions(root.state))
-            num_explored = len(root.children)
+            if root.untried_actions is None:
+                root._set_untried_actions(prior_policy)
             # If we haven't explored all possible actions, expand
-            if num_explored < num_actions:
+            if root.untried_actions and root._can_widen(widening):
                 return root._expand()
             # If we have, get the best action to rollout from
             else:
                 root = sel_policy(root)
         return root
 
-    def simulate_game(self, sim_policy):
+    def expand_all(self, prior_policy=None, max_children=None):
+        """
+        Expand every untried action of the current node at once.
+
+        Args:
+            prior_policy (Optional[function(Game, State, list[Action])
+                -> list[float]]): The policy giving prior probabilities of
+                actions, if they haven't been computed yet. See `select`.
+            max_children (Optional[int]): Stop expanding once the node has
+                this many children, taking actions in order of their priors.
+                Defaults to None (expand every action).
+
+        Returns:
+            list[MCTree] of all children of the current node.
+        """
+        if self.untried_actions is None:
+            self._set_untried_actions(prior_policy)
+        while self.untried_actions and (
+                max_children is None or len(self.children) < max_children):
+            self._expand()
+        return list(self.children)
+
+    def simulate_game(self, sim_policy, trace=None, max_depth=None):
         """
         Simulation phase for MCTS. Uses appropriate policy.
 
@@ -80,47 +153,119 @@ class MCTree(object):
             sim_policy (function(Game, State) -> Action): The policy to be
                 used to choose actions during game simulations. See Mopy
                 for more information.
+            trace (Optional[list]): If given, a (player, action) pair is
+                appended for every action of the simulated game, where
+                player is the zero-indexed number of the player who took
+                it. Defaults to None (no trace is kept).
+            max_depth (Optional[int]): If given, stop the simulated game
+                after this many actions and score it with Game.evaluate.
+                Defaults to None (play until the game is complete).
 
         Returns:
             int representing the zero-indexed player number of the winner
-            of the simulated game from the current node.
+            of the simulated game from the current node. If the simulation
+            was cut off, a float between 0 and 1 estimating it instead.
         """
         current_state = deepcopy(self.state)
+        depth = 0
         while not self.game.is_over(current_state):
+            if depth == max_depth:
+                return self.game.evaluate(current_state)
+            depth += 1
             next_action = sim_policy(self.game, current_state)
+            if trace is not None:
+                trace.append((current_state.current_player, next_action))
             self.game.do_action(current_state, next_action)
         return self.game.get_result(current_state)
 
-    def backup_result(self, result, backup_policy):
+    def backup_result(self, result, backup_policy, trace=None):
         """
         Backpropagation phase for MCTS. Uses appropriate policy.
 
         Args:
             result (int): Zero-indexed player number of the winner
-                of the game at the current node.
+                of the game at the current node, or a float between 0 and 1
+                if the result was estimated.
             backup_policy (function(MCTree, Result)): The policy to be
                 used to backpropagate the game simulation results up
                 the tree. See Mopy for more information.
+            trace (Optional[list]): The (player, action) pairs of the
+                simulated game, as recorded by `simulate_game`. If given,
+                `backup_policy` is also passed the set of (player, action)
+                pairs played from each node onward, tree actions included.
+                Defaults to None.
+        """
+        if trace is not None:
+            played = set(trace)
+        root = self
+        while root:
+            if trace is None:
+                backup_policy(root, result)
+            else:
+                backup_policy(root, result, played)
+                if root.parent:
+                    played.add((root.parent.state.current_player, root.action))
+            root = root.parent
+
+    def backup_results(self, results, backup_policy):
+        """
+        Backpropagate many simulation results from the current node at once.
+
+        Args:
+            results (iterable[int]): Zero-indexed player numbers of the
+                winners of games simulated from the current node.
+            backup_policy (function(MCTree, Result)): The policy to be
+                used to backpropagate the game simulation results up
+                the tree. See Mopy for more information.
+        """
+        counts = Counter(int(r) for r in results)
+        root = self
+        while root:
+            for result, count in counts.items():
+                for _ in range(count):
+                    backup_policy(root, result)
+            root = root.parent
+
+    def add_virtual_loss(self, amount=1):
+        """
+        Add visits without wins to the current node and its ancestors.
+
+        Args:
+            amount (Optional[int]): How many visits to add. Use a negative
+                amount to revert a previous virtual loss. Defaults to 1.
+
+        Notes:
+            This lets several nodes be selected before any of their
+            results are backed up, as in batched or parallel searches.
+            Pending nodes look explored (and slightly worse) to selection
+            policies, which spreads selections out over the tree.
         """
         root = self
         while root:
-            backup_policy(root, result)
+            root.total_games += amount
             root = root.parent
 
-    def get_best_action(self):
+    def get_best_action(self, final_policy=None):
         """
         Selects best action to take from current root state.
 
+        Args:
+            final_policy (Optional[function(MCTree) -> MCTree]): The policy
+                choosing the best child. See mopy.policies.final. Defaults
+                to None (the child with the best win/loss ratio).
+
         Returns:
             Action representing the best immediate action from
             current node.
 
         Notes:
             Most MCTS implementations select the action with the best
-            win/loss ratio. If this isn't the behaviour you want, you
-            can subclass MCTree and just reimplement get_best_action
-            to your liking.
+            win/loss ratio. If this isn't the behaviour you want, pass
+            another final policy, or subclass MCTree and just reimplement
+            get_best_action to your liking.
         """
+        if final_policy is not None:
+            return final_policy(self).action
         best_node = max(self.children, key=attrgetter("win_ratio"))
         return best_node.action
 
@@ -130,7 +275,9 @@ class MCTree(object):
 
         Args:
             other (MCTree): The tree whose actions we're merging into
-                our current tree.
+                our current tree. Anything with the same `children`,
+                `action`, `won_games` and `total_games` attributes works
+                too, such as a serialization.CompactNode.
 
         Notes:
             This only merges direct children of self and other, since when
@@ -147,23 +294,98 @@ class MCTree(object):
             original_actions.add(c.action)
         for c in other.children:
             if c.action not in original_actions:
-                self.children.append(MCTree(self.game, self.state, c.action))
+                new_node = type(self)(self.game, self.state, c.action)
+                self.children.append(new_node)
+                if c.action in (self.untried_actions or ()):
+                    i = self.untried_actions.index(c.action)
+                    del self.untried_actions[i]
+                    if self.untried_priors is not None:
+                        del self.untried_priors[i]
             won_count_map[c.action] += c.won_games
             total_count_map[c.action] += c.total_games
         for c in self.children:
             won, total = won_count_map[c.action], total_count_map[c.action]
             c.won_games, c.total_games = won, total
 
+    def transformed(self, state, from_symmetry, to_symmetry):
+        """
+        Copy the tree below the current node onto an equivalent state.
+
+        Args:
+            state (State): A state equivalent to ours under a symmetry of
+                the game, such that both have the same canonical form.
+            from_symmetry: The symmetry taking our state to its canonical
+                form, as returned by Game.get_canonical_key.
+            to_symmetry: The symmetry taking `state` to its canonical form.
+
+        Returns:
+            MCTree of `state` with the statistics of the current node, and
+            a copy of every descendant with its action mapped onto `state`.
+            States are rebuilt by replaying the mapped actions.
+        """
+        game = self.game
+
+        def transform(action):
+            action = game.transform_action(action, from_symmetry)
+            return game.transform_action(action, to_symmetry, inverse=True)
+
+        root = type(self)(game, state)
+        stack = [(self, root)]
+        while stack:
+            node, copy = stack.pop()
+            copy.won_games, copy.total_games = node.won_games, node.total_games
+            copy.amaf_won_games = node.amaf_won_games
+            copy.amaf_total_games = node.amaf_total_games
+            copy.prior = node.prior
+            if node.untried_actions is not None:
+                copy.untried_actions = [
+                    transform(a) for a in node.untried_actions]
+            if node.untried_priors is not None:
+                copy.untried_priors = list(node.untried_priors)
+            for child in node.children:
+                action = transform(child.action)
+                child_state = deepcopy(copy.state)
+                game.do_action(child_state, action)
+                child_copy = type(self)(game, child_state, action, copy)
+                copy.children.append(child_copy)
+                stack.append((child, child_copy))
+        return root
+
+    def _can_widen(self, widening):
+        """Whether progressive widening allows us another child."""
+        if widening is None or not self.children:
+            return True
+        k, alpha = widening
+        return len(self.children) < k * self.total_games**alpha
+
+    def _set_untried_actions(self, prior_policy=None):
+        """Find distinct unexplored actions, ordered for expansion."""
+        all_actions = self.game.get_distinct_actions(self.state)
+        explored_actions = set(c.action for c in self.children)
+        actions = [a for a in all_actions if a not in explored_actions]
+        if prior_policy is None or not actions:
+            shuffle(actions)
+            self.untried_actions = actions
+            return
+
+        priors = prior_policy(self.game, self.state, actions)
+        total = sum(priors)
+        if total > 0:
+            priors = [p / total for p in priors]
+        # Highest priors last, since we expand from the end
+        order = sorted(range(len(actions)), key=priors.__getitem__)
+        self.untried_actions = [actions[i] for i in order]
+        self.untried_priors = [priors[i] for i in order]
+
     def _expand(self):
         """Expansion phase for MCTS for nodes with unexplored actions."""
-        all_actions = self.game.get_legal_actions(self.state)
-        explored_actions = [c.action for c in self.children]
-        new_actions = [a for a in all_actions if a not in explored_actions]
-
-        next_action = choice(new_actions)
+        next_action = self.untried_actions.pop()
         next_state = deepcopy(self.state)
         self.game.do_action(next_state, next_action)
 
-        new_node = MCTree(self.game, next_state, next_action, parent=self)
+        new_node = type(self)(
+            self.game, next_state, next_action, parent=self)
+        if self.untried_priors is not None:
+            new_node.prior = self.untried_priors.pop()
         self.children.append(new_node)
         return new_node
@@ -9,10 +9,24 @@ See Browne et al(2012) for an in-depth overview of MCTS methods:
 http://www.cameronius.com/cv/mcts-survey-master.pdf
 """
 
-from multiprocessing import Process, Manager
+import asyncio
+import gc
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+from contextlib import contextmanager
+from copy import deepcopy
+from functools import partial
+from multiprocessing import Event, Process, Manager
+from mopy import distributed, serialization
+from mopy.checkpoint import Checkpointer
 from mopy.mctree import MCTree
-from mopy.policies import backup, selection, simulation
-from time import clock
+from mopy.pool import SearchPool
+from mopy.profiling import SearchProfile, ProfiledGame, ProfiledTree
+from mopy.result import SearchResult
+from mopy.policies import backup, final, selection, simulation
+from math import ceil, log2
+from time import perf_counter as clock, time
 
 
 class Mopy(object):
@@ -22,7 +36,20 @@ class Mopy(object):
             self, *,
             sel_policy=selection.UCT,
             sim_policy=simulation.random_action,
-            backup_policy=backup.win_loss_ratio):
+            backup_policy=backup.win_loss_ratio,
+            final_policy=final.max_ratio,
+            prior_policy=None,
+            widening=None,
+            rollout_depth=None,
+            sequential_halving=False,
+            profile=False,
+            book=None,
+            book_warm_start=None,
+            cache=None,
+            ponder=False,
+            ponder_time=60.0,
+            ponder_sims=None,
+            gc_mode=None):
         """
         Initialize the algorithm with appropriate policies.
 
@@ -32,18 +59,115 @@ class Mopy(object):
                 Defaults to the traditional UCT policy.
             sim_policy (Optional[function(Game, State) -> Action]):
                 The policy to be used to choose actions during
-                game simulations from the selected node.
+                game simulations from the selected node. Stateful policies
+                such as simulation.MAST are updated after every simulation.
                 Defaults to choosing actions uniformly at random.
             backup_policy (Optional[function(MCTree, Result)]):
                 The policy to be used to backpropagate game simulation
                 results up the tree. Defaults to updating
                 the win/loss ratio of nodes.
+            final_policy (Optional[function(MCTree) -> MCTree]):
+                The policy to be used to choose the action returned once
+                a search is complete. Defaults to the action with the best
+                win/loss ratio.
+            prior_policy (Optional[function(Game, State, list[Action])
+                -> list[float]]): The policy to be used to weigh actions
+                when a node is first expanded. Actions are expanded in
+                order of their priors, and selection policies such as PUCT
+                use them. Defaults to None (random expansion order).
+            widening (Optional[Tuple(float, float)]): Progressive widening
+                constants (k, alpha). A node visited n times is limited to
+                k * n^alpha children, which lets the search go deep early in
+                games with many actions. Untried actions are added in order
+                of their priors. Defaults to None (no widening).
+            rollout_depth (Optional[int]): If given, game simulations are
+                cut off after this many actions and scored by the game's
+                evaluate method instead. Defaults to None (simulate until
+                the game is complete).
+            sequential_halving (Optional[bool]): If True, `search` splits
+                its budget over rounds at the root. Every round gives each
+                remaining root action an equal share of simulations and
+                then drops the worse half. Below the root, nodes are
+                selected as usual. Best suited to fixed simulation budgets.
+                Defaults to False (root actions are selected like any other
+                node's).
+            profile (Optional[bool]): If True, record per-phase timings,
+                game method calls and other counters of every search into
+                `last_profile`. Defaults to False (no overhead at all).
+            book (Optional[OpeningBook]): Positions searched ahead of time.
+                `search` answers positions in the book instantly, without
+                simulating any games. Defaults to None (no book).
+            book_warm_start (Optional[int]): If given, book positions are
+                searched anyway, starting from the book statistics scaled
+                down to at most this many simulations. Defaults to None
+                (answer book positions instantly).
+            cache (Optional[SearchCache]): Cache of earlier `search`
+                results, shared by any searches with the same policies and
+                options. Positions with enough cached simulations are
+                answered instantly. Policies are told apart by name and
+                the values they close over or were partially applied to,
+                or by a `cache_key` attribute if they have one. Defaults to
+                None (no cache).
+            ponder (Optional[bool]): If True, `search` keeps searching in a
+                background thread after returning, from the position its
+                action leads to, while the opponent thinks. If the next
+                `search` is from a position that was reached in the
+                background tree, it starts from that subtree. Positions are
+                matched by `get_canonical_key`. Defaults to False.
+            ponder_time (Optional[float]): Most seconds to ponder after a
+                search, in case the next one never comes. Defaults to 60.
+            ponder_sims (Optional[int]): Most simulations to ponder after
+                a search. Defaults to None (no limit besides `ponder_time`).
+            gc_mode (Optional[str]): How to run the cyclic garbage
+                collector, whose scans of large trees cause latency spikes.
+                "pause" disables it during search loops. "freeze" also
+                moves every object alive after a search into the permanent
+                generation (see gc.freeze), so retained trees are never
+                scanned again. Trees hold no reference cycles, so they are
+                still freed when dropped. Defaults to None (leave the
+                collector alone).
+
+        Attributes:
+            last_profile (SearchProfile): Profile of the most recent search
+                (merged over all workers for parallel searches). None unless
+                profiling is enabled.
         """
         self.sel_policy = sel_policy
         self.sim_policy = sim_policy
         self.backup_policy = backup_policy
+        self.final_policy = final_policy
+        self.prior_policy = prior_policy
+        self.widening = widening
+        self.rollout_depth = rollout_depth
+        self.sequential_halving = sequential_halving
+        self.profile = profile
+        self.last_profile = None
+        self.book = book
+        self.book_warm_start = book_warm_start
+        self.cache = cache
+        self.ponder = ponder
+        if ponder and ponder_time is None and ponder_sims is None:
+            raise ValueError("Pondering needs a time or simulation budget!")
+        self.ponder_time = ponder_time
+        self.ponder_sims = ponder_sims
+        if gc_mode not in (None, "pause", "freeze"):
+            raise ValueError("Unknown gc_mode %r!" % (gc_mode,))
+        self.gc_mode = gc_mode
+        self._ponder_root = None
+        self._ponder_thread = None
+        self._ponder_stop = None
+
+    def __getstate__(self):
+        # Background searches stay with the process that started them
+        state = self.__dict__.copy()
+        state.update(_ponder_root=None, _ponder_thread=None,
+                     _ponder_stop=None)
+        return state
 
-    def search(self, game, state, search_time=0.5):
+    def search(
+            self, game, state, search_time=0.5, num_sims=None,
+            return_result=False, stop_event=None, checkpoint_path=None,
+            checkpoint_interval=60.0):
         """
         Search for the best action of `game` from `state`.
 
@@ -52,27 +176,170 @@ class Mopy(object):
 
             state (State): The current state of `game`.
 
-            num_sims (Optional[float]): How long to run the MCTS for in
-                seconds. Defaults to half a second (0.5).
+            search_time (Optional[float]): How long to run the MCTS for in
+                seconds. Defaults to half a second (0.5). None means no
+                time limit, in which case `num_sims` must be given.
+
+            num_sims (Optional[int]): How many games to simulate at most.
+                Defaults to None (no limit). If both budgets are given, the
+                search stops as soon as either runs out.
+
+            return_result (Optional[bool]): If True, return a SearchResult
+                with statistics of the search instead of just the action.
+                Defaults to False.
+
+            stop_event (Optional[threading.Event]): Stop searching as soon
+                as this event is set, once there is an action to return.
+                Defaults to None (search until a budget runs out).
+
+            checkpoint_path (Optional[str]): If given, the search tree is
+                saved to this file every `checkpoint_interval` seconds and
+                once the search is done, in the compact format of
+                mopy.serialization. Continue the search later with
+                `resume_search`. Defaults to None (no checkpoints).
+
+            checkpoint_interval (Optional[float]): Seconds between
+                checkpoints. Defaults to 60.
 
         Returns:
             Action that represents the action with the maximum reward
-            from `state`
+            from `state`, or a SearchResult if `return_result` is True.
 
         Notes:
             `game` and `state` must be full implementations of the Game and
             State abstract base classes.
         """
-        root = MCTree(game, state)
         start_time = clock()
-        while (clock() - start_time) < search_time:
-            selected_node = root.select(self.sel_policy)
-            result = selected_node.simulate_game(self.sim_policy)
-            selected_node.backup_result(result, self.backup_policy)
+        root = self._take_ponder_root(game, state)
+        answered, start_stats = False, []
+        if root is None:
+            root = self._new_root(game, state)
+            answered, start_stats = self._warm_start(root)
+        checkpoint = None
+        if checkpoint_path is not None:
+            checkpoint = Checkpointer(checkpoint_path, checkpoint_interval)
+        return self._search_root(
+            root, start_time, search_time, num_sims, return_result,
+            stop_event, checkpoint, answered, start_stats)
+
+    def resume_search(
+            self, game, state, checkpoint_path, search_time=0.5,
+            num_sims=None, return_result=False, stop_event=None,
+            checkpoint_interval=60.0):
+        """
+        Continue a checkpointed search of `game` from `state`.
+
+        The tree saved by an earlier `search` (or `resume_search`) with
+        `checkpoint_path` is loaded, and searched for another `search_time`
+        seconds or `num_sims` simulations. Checkpoints keep being saved to
+        the same file. States of the saved tree are rebuilt by replaying
+        its actions from `state`, so `state` must be the state the search
+        started from. Statistics only used by RAVE are not saved.
+
+        See `search` for the arguments and what is returned.
+        """
+        start_time = clock()
+        self.stop_pondering()
+        root = self._load_root(game, state, checkpoint_path)
+        checkpoint = Checkpointer(checkpoint_path, checkpoint_interval)
+        return self._search_root(
+            root, start_time, search_time, num_sims, return_result,
+            stop_event, checkpoint)
+
+    def _search_root(
+            self, root, start_time, search_time, num_sims, return_result,
+            stop_event=None, checkpoint=None, answered=False,
+            start_stats=()):
+        """Search from `root`, which may already have simulations."""
+        with self._managed_gc():
+            if answered:
+                action = root.get_best_action(self.final_policy)
+            elif self.sequential_halving:
+                action = self._halving_search(
+                    root, search_time, num_sims, stop_event, checkpoint)
+            else:
+                self._run_search(
+                    root, search_time, num_sims, stop_event, checkpoint)
+                action = root.get_best_action(self.final_policy)
+        if checkpoint is not None:
+            checkpoint.close(root)
+        if self.cache is not None and not answered:
+            self._cache_result(root, start_stats)
+        elapsed = clock() - start_time
+        self._finish_profile([root], elapsed)
+        result = None
+        if return_result:
+            result = SearchResult(root, action, elapsed)
+        if self.ponder:
+            self._start_pondering(root, action)
+        return result if return_result else action
+
+    def stop_pondering(self):
+        """
+        Stop searching in the background, and throw away the tree.
+
+        Call this when the game is over, or before searching another game.
+        """
+        if self._ponder_thread is not None:
+            self._ponder_stop.set()
+            self._ponder_thread.join()
+        self._ponder_root = self._ponder_thread = self._ponder_stop = None
+
+    def batch_search(
+            self, game, state, batch_game, search_time=0.5,
+            leaves_per_batch=32, playouts_per_leaf=16):
+        """
+        Search for the best action of `game` from `state` in batches.
+
+        Instead of simulating one game after every selection, we select
+        `leaves_per_batch` leaves, simulate `playouts_per_leaf` random games
+        from each of them at once through `batch_game`, and back up all
+        results together. Virtual losses keep selection from picking the
+        same pending path over and over within a batch.
+
+        Args:
+            game (Game): The game implementation to be used for MCTS.
+            state (State): The current state of `game`.
+            batch_game (BatchGame): Batched implementation of `game` used
+                for random playouts. The simulation policy is not used.
+            search_time (Optional[float]): How long to run the MCTS for in
+                seconds. Defaults to half a second (0.5).
+            leaves_per_batch (Optional[int]): How many leaves to select
+                before simulating. Defaults to 32.
+            playouts_per_leaf (Optional[int]): How many random games to play
+                from each selected leaf. Defaults to 16.
+
+        Returns:
+            Action that represents the action with the maximum reward
+            from `state`
+        """
+        root = self._new_root(game, state)
+        start_time = clock()
+        with self._managed_gc():
+            while (clock() - start_time) < search_time:
+                leaves = []
+                for _ in range(leaves_per_batch):
+                    leaf = root.select(
+                        self.sel_policy, self.prior_policy, self.widening)
+                    leaf.add_virtual_loss(playouts_per_leaf)
+                    leaves.append(leaf)
+
+                states = [leaf.state for leaf in leaves
+                          for _ in range(playouts_per_leaf)]
+                results = batch_game.simulate(batch_game.encode_states(states))
 
-        return root.get_best_action()
+                for i, leaf in enumerate(leaves):
+                    leaf.add_virtual_loss(-playouts_per_leaf)
+                    start = i * playouts_per_leaf
+                    leaf_results = results[start:start + playouts_per_leaf]
+                    leaf.backup_results(leaf_results, self.backup_policy)
 
-    def parallel_search(self, game, state, search_time=0.5, num_workers=4):
+        self._finish_profile([root], clock() - start_time)
+        return root.get_best_action(self.final_policy)
+
+    def parallel_search(
+            self, game, state, search_time=0.5, num_workers=4,
+            num_sims=None, return_result=False, stop_event=None):
         """
         Searches for the best action of `game` from `state` in parallel.
 
@@ -89,29 +356,602 @@ class Mopy(object):
         Best results are usually found when `num_workers` is equal to the
         number of CPU cores available. That is, if you are using 4 cores,
         8 workers will show little to no improvement from 4 workers.
+
+        Workers send their root actions back in the compact format of
+        mopy.serialization if the game implements `get_action_from_id`
+        (see serialization.dumps_root_actions).
+
+        Like `search_time`, `num_sims` is a total shared by all workers.
+        Sequential halving is not used by parallel searches. If
+        `return_result` is True, a SearchResult of the combined tree is
+        returned, with a SearchResult per worker in its `workers`.
+        To stop workers early, `stop_event` must be a multiprocessing.Event.
         """
+        start_time = clock()
         manager = Manager()
         root_list = manager.list()
         procs = []
-        worker_search_time = search_time / num_workers
+        worker_search_time, worker_num_sims = search_time, num_sims
+        if search_time is not None:
+            worker_search_time = search_time / num_workers
+        if num_sims is not None:
+            worker_num_sims = max(1, num_sims // num_workers)
         for _ in range(num_workers):
             p = Process(target=self._search_job,
-                        args=(root_list, game, state, worker_search_time,))
+                        args=(root_list, game, state, worker_search_time,
+                              worker_num_sims, return_result, stop_event))
             procs.append(p)
             p.start()
         for p in procs:
             p.join()
 
-        first_root = root_list[0]
-        for i in range(1, len(root_list)):
-            first_root.combine_root_actions(root_list[i])
-        return first_root.get_best_action()
+        trees, worker_results, profiles = zip(*root_list)
+        first_root = self._combine_roots(game, state, trees)
+        if self.profile:
+            self._merge_profiles(profiles)
+        action = first_root.get_best_action(self.final_policy)
+        if return_result:
+            elapsed = clock() - start_time
+            return SearchResult(first_root, action, elapsed,
+                                workers=list(worker_results))
+        return action
+
+    def distributed_search(
+            self, game, state, workers, search_time=0.5, num_sims=None,
+            timeout=None, return_result=False):
+        """
+        Search for the best action of `game` from `state` on remote workers.
+
+        Every worker in `workers` (see mopy.distributed.WorkerServer)
+        searches from `state` at once, and the root actions of all their
+        trees are combined into one tree we choose the best action from.
+        Unlike `parallel_search`, every worker searches for the whole
+        `search_time`, since they run on separate cores. `num_sims` is
+        split evenly between workers.
+
+        Args:
+            game (Game): The game implementation to be used for MCTS.
+            state (State): The current state of `game`.
+            workers (list[Tuple(str, int)]): (host, port) of each worker.
+            search_time (Optional[float]): How long every worker searches,
+                in seconds. Defaults to half a second (0.5).
+            num_sims (Optional[int]): How many games to simulate at most,
+                over all workers. Defaults to None (no limit).
+            timeout (Optional[float]): Seconds to wait for any worker before
+                leaving it out. Defaults to None (`search_time` plus 5
+                seconds, or distributed.SIMS_TIMEOUT for simulation budgets
+                only).
+            return_result (Optional[bool]): If True, return a SearchResult
+                of the combined tree instead of just the action. Defaults
+                to False.
+
+        Returns:
+            Action that represents the action with the maximum reward
+            from `state`, or a SearchResult if `return_result` is True.
+
+        Raises:
+            ValueError if `workers` is empty.
+            ConnectionError if no worker replied.
+        """
+        if not workers:
+            raise ValueError("Distributed search needs at least one worker!")
+        start_time = clock()
+        if timeout is None and search_time is not None:
+            timeout = search_time + 5
+        elif timeout is None:
+            timeout = distributed.SIMS_TIMEOUT
+        worker_num_sims = num_sims
+        if num_sims is not None:
+            worker_num_sims = max(1, num_sims // len(workers))
+        trees = distributed.collect_roots(
+            self, game, state, workers, search_time, worker_num_sims,
+            timeout)
+        if not trees:
+            raise ConnectionError("No workers returned a search!")
+
+        root = self._combine_roots(game, state, trees)
+        action = root.get_best_action(self.final_policy)
+        if return_result:
+            return SearchResult(root, action, clock() - start_time)
+        return action
+
+    def search_many(
+            self, game, states, search_time=0.5, num_sims=None,
+            num_workers=None, return_result=False):
+        """
+        Search for the best action from each of many independent states.
+
+        Searches run on a pool of `num_workers` processes started for this
+        call, and are yielded as soon as they finish. To reuse worker
+        processes across calls, use a mopy.pool.SearchPool directly.
+
+        Args:
+            game (Game): The game implementation to be used for MCTS.
+            states (iterable[State]): The positions to search.
+            search_time (Optional[float]): Seconds to search each position.
+                Defaults to half a second (0.5).
+            num_sims (Optional[int]): Most simulations for each position.
+                Defaults to None (no limit).
+            num_workers (Optional[int]): How many positions to search at
+                once. Defaults to None (one per CPU core).
+            return_result (Optional[bool]): If True, yield SearchResults
+                instead of actions. Defaults to False.
+
+        Yields:
+            Tuple(int, Action) of the index of each position in `states` and
+            its best action (or SearchResult), in the order searches finish.
+        """
+        with SearchPool(self, game, num_workers) as pool:
+            yield from pool.search_many(
+                states, search_time, num_sims, return_result)
+
+    async def search_async(
+            self, game, state, search_time=0.5, num_sims=None,
+            return_result=False, executor=None):
+        """
+        Search like `search`, without blocking the running event loop.
+
+        The search runs on `executor`. Its `search_time` counts from when
+        this coroutine is called, so time spent queued behind other
+        searches on a busy executor comes out of its budget. A search still
+        queued past its deadline simulates a single game and returns.
+
+        Cancelling the coroutine, for example when a client disconnects,
+        stops the search. Searches already running in a process pool can't
+        be stopped, so they run until their budget is spent and their
+        result is thrown away.
+
+        Args:
+            executor (Optional[concurrent.futures.Executor]): Where to run
+                the search. Defaults to None (the event loop's default
+                thread pool).
+
+        See `search` for the other arguments and what is returned.
+        """
+        stop_event = None
+        if not isinstance(executor, ProcessPoolExecutor):
+            stop_event = threading.Event()
+        return await self._run_async(
+            executor, stop_event, self._search_until, game, state,
+            _deadline(search_time), num_sims, return_result, stop_event)
+
+    async def parallel_search_async(
+            self, game, state, search_time=0.5, num_workers=4,
+            num_sims=None, return_result=False, executor=None):
+        """
+        Search like `parallel_search`, without blocking the event loop.
 
-    def _search_job(self, root_list, game, state, search_time):
+        Worker processes are started from a thread of `executor`, and stop
+        as soon as the coroutine is cancelled. Like `search_async`, time
+        spent queued comes out of `search_time`.
+
+        Args:
+            executor (Optional[concurrent.futures.ThreadPoolExecutor]):
+                Where to wait for the workers. Defaults to None (the event
+                loop's default thread pool).
+
+        See `parallel_search` for the other arguments and what is returned.
+        """
+        stop_event = Event()
+        return await self._run_async(
+            executor, stop_event, self._parallel_search_until, game, state,
+            _deadline(search_time), num_workers, num_sims, return_result,
+            stop_event)
+
+    async def _run_async(self, executor, stop_event, func, *args):
+        """Await `func` on `executor`, stopping it when we're cancelled."""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except asyncio.CancelledError:
+            if stop_event is not None:
+                stop_event.set()
+            raise
+
+    def _search_until(
+            self, game, state, deadline, num_sims, return_result,
+            stop_event):
+        search_time, num_sims = _budget_left(deadline, num_sims)
+        return self.search(game, state, search_time, num_sims,
+                           return_result, stop_event)
+
+    def _parallel_search_until(
+            self, game, state, deadline, num_workers, num_sims,
+            return_result, stop_event):
+        search_time, num_sims = _budget_left(deadline, num_sims)
+        return self.parallel_search(game, state, search_time, num_workers,
+                                    num_sims, return_result, stop_event)
+
+    def _search_job(
+            self, root_list, game, state, search_time, num_sims,
+            return_result=False, stop_event=None):
+        root = self._new_root(game, state)
+        start_time = clock()
+        with self._managed_gc():
+            self._run_search(root, search_time, num_sims, stop_event)
+        elapsed = clock() - start_time
+        if self.profile:
+            root.game.profile.wall_time = elapsed
+        result = profile = None
+        if return_result:
+            action = root.get_best_action(self.final_policy)
+            result = SearchResult(root, action, elapsed)
+        if self.profile:
+            profile = root.game.profile
+        root_list.append((serialization.dumps_root_actions(root), result,
+                          profile))
+
+    def _combine_roots(self, game, state, trees):
+        """
+        Combine the root actions of searches from `state` into one tree.
+
+        Args:
+            trees (list): Root actions of each search, as returned by
+                serialization.dumps_root_actions.
+
+        Returns:
+            MCTree of `state` whose children hold the summed statistics of
+            every action searched by any of `trees`.
+        """
+        if serialization.has_action_ids(game):
+            root = serialization.loads(trees[0], game, state)
+            for data in trees[1:]:
+                with serialization.CompactTree(data, game) as other:
+                    root.combine_root_actions(other.root)
+                    root.total_games += other.root.total_games
+            return root
+
+        totals = OrderedDict()
+        for stats in trees:
+            for action, visits, wins in stats:
+                total = totals.setdefault(action, [0, 0])
+                total[0] += visits
+                total[1] += wins
         root = MCTree(game, state)
+        for action, (visits, wins) in totals.items():
+            next_state = deepcopy(state)
+            game.do_action(next_state, action)
+            child = MCTree(game, next_state, action, parent=root)
+            child.won_games, child.total_games = wins, visits
+            root.children.append(child)
+            root.total_games += visits
+        return root
+
+    def _new_root(self, game, state):
+        """Create the root of a new search tree, profiled if enabled."""
+        if not self.profile:
+            return MCTree(game, state)
+        return ProfiledTree(ProfiledGame(game, SearchProfile()), state)
+
+    def _load_root(self, game, state, path):
+        """Load a saved search tree, profiled if enabled."""
+        if not self.profile:
+            return serialization.load(path, game, state)
+        game = ProfiledGame(game, SearchProfile())
+        return serialization.load(path, game, state, ProfiledTree)
+
+    def _finish_profile(self, roots, wall_time=None):
+        """Merge the profiles of finished search trees into last_profile."""
+        if not self.profile:
+            return
+        self._merge_profiles([root.game.profile for root in roots],
+                             wall_time)
+
+    def _merge_profiles(self, profiles, wall_time=None):
+        """Merge finished search profiles into last_profile."""
+        profile = profiles[0]
+        if wall_time is not None:
+            profile.wall_time = wall_time
+        for other in profiles[1:]:
+            profile.merge(other)
+        self.last_profile = profile
+
+    @contextmanager
+    def _managed_gc(self):
+        """Run the body with the garbage collector managed by gc_mode."""
+        if self.gc_mode is None:
+            yield
+            return
+        was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            yield
+        finally:
+            if self.gc_mode == "freeze":
+                gc.freeze()
+            if was_enabled:
+                gc.enable()
+
+    def _start_pondering(self, root, action):
+        """Search the subtree of `action` from `root` in the background."""
+        node = next((c for c in root.children if c.action == action), None)
+        if node is None or root.game.is_over(node.state):
+            return
+        node.parent, node.action = None, None
+        self._ponder_root = node
+        self._ponder_stop = threading.Event()
+        self._ponder_thread = threading.Thread(
+            target=self._run_search,
+            args=(node, self.ponder_time, self.ponder_sims,
+                  self._ponder_stop),
+            daemon=True)
+        self._ponder_thread.start()
+
+    def _take_ponder_root(self, game, state):
+        """
+        Stop pondering, and find the node of `state` in the pondered tree.
+
+        Positions are matched by the canonical keys of `game`, so an
+        opponent action equivalent to one we tried also reuses its subtree,
+        mapped onto `state` through the symmetries of both positions.
+
+        Returns:
+            MCTree of `state` with the simulations done while pondering, to
+            be used as the root of a new search. None if we weren't
+            pondering, or the opponent reached a position we never tried.
+        """
+        ponder_root = self._ponder_root
+        self.stop_pondering()
+        if ponder_root is None:
+            return None
+        key, symmetry = game.get_canonical_key(state)
+        for child in ponder_root.children:
+            child_key, child_symmetry = game.get_canonical_key(child.state)
+            if child_key != key:
+                continue
+            if child_symmetry != symmetry:
+                return child.transformed(state, child_symmetry, symmetry)
+            child.parent, child.action = None, None
+            return child
+        return None
+
+    def _warm_start(self, root):
+        """
+        Start `root` from the book or cache statistics of its state.
+
+        Returns:
+            Tuple(bool, list) of whether the search is already answered, and
+            the (action, visits, wins) statistics the root started from.
+        """
+        if self.book is not None:
+            stats = self.book.lookup(root.game, root.state)
+            if stats:
+                stats = self._start_from_stats(
+                    root, stats, self.book_warm_start)
+                return self.book_warm_start is None, stats
+        if self.cache is not None:
+            stats = self.cache.get(
+                root.game, root.state, self._config_key())
+            if stats and self.cache.accumulate:
+                return False, self._start_from_stats(root, stats)
+            if stats and self.cache.is_trusted(stats):
+                return True, self._start_from_stats(root, stats)
+        return False, []
+
+    def _start_from_stats(self, root, stats, max_sims=None):
+        """
+        Give `root` a child with the statistics of each given action.
+
+        Args:
+            root (MCTree): A root without any children yet.
+            stats (list[Tuple(Action, float, float)]): The (action, visits,
+                wins) of each child.
+            max_sims (Optional[int]): Scale the statistics down to at most
+                this many simulations. Defaults to None (keep them as is).
+
+        Returns:
+            list[Tuple(Action, float, float)] of the statistics given to the
+            children, after scaling.
+        """
+        total = sum(visits for _, visits, _ in stats)
+        if max_sims is not None and total > max_sims:
+            scale = max_sims / total
+            stats = [(a, v * scale, w * scale) for a, v, w in stats]
+            total = max_sims
+
+        for action, visits, wins in stats:
+            next_state = deepcopy(root.state)
+            root.game.do_action(next_state, action)
+            child = type(root)(root.game, next_state, action, parent=root)
+            child.won_games, child.total_games = wins, visits
+            root.children.append(child)
+        if self.profile:
+            root.game.profile.counters["deepcopies"] += len(stats)
+        root.total_games = total
+        return stats
+
+    def _cache_result(self, root, start_stats):
+        """Cache the root statistics of a finished search."""
+        stats = [(c.action, c.total_games, c.won_games)
+                 for c in root.children]
+        if self.cache.accumulate:
+            # Only add what this search found, others may have added too
+            start = {a: (v, w) for a, v, w in start_stats}
+            stats = [(a, v - start.get(a, (0, 0))[0],
+                      w - start.get(a, (0, 0))[1]) for a, v, w in stats]
+        self.cache.put(root.game, root.state, stats, self._config_key())
+
+    def _config_key(self):
+        """Everything about this Mopy that changes the results of a search."""
+        policies = (self.sel_policy, self.sim_policy, self.backup_policy,
+                    self.final_policy, self.prior_policy)
+        return tuple(_policy_key(p) for p in policies) + (
+            self.widening, self.rollout_depth, self.sequential_halving)
+
+    def _run_search(
+            self, root, search_time, num_sims, stop_event=None,
+            checkpoint=None):
+        """Run MCTS iterations from `root` until a budget runs out."""
+        if search_time is None and num_sims is None:
+            raise ValueError("Search needs a time or simulation budget!")
+        if search_time is None:
+            search_time = float("inf")
+        if num_sims is None:
+            num_sims = float("inf")
+
         start_time = clock()
-        while (clock() - start_time) < search_time:
-            selected_node = root.select(self.sel_policy)
-            result = selected_node.simulate_game(self.sim_policy)
-            selected_node.backup_result(result, self.backup_policy)
-        root_list.append(root)
+        sims = 0
+        while sims < num_sims and (clock() - start_time) < search_time:
+            if _stopped(root, stop_event):
+                break
+            self._run_simulation(root)
+            sims += 1
+            if checkpoint is not None:
+                checkpoint.maybe_save(root)
+
+    def _halving_search(
+            self, root, search_time, num_sims, stop_event=None,
+            checkpoint=None):
+        """
+        Search with sequential halving over the actions at `root`.
+
+        Every root action gets one simulation when it is expanded (or only
+        as many actions as the budget allows). The rest of the budget is
+        split evenly over ceil(log2(actions)) rounds, and each round is
+        split over the actions still in the running, which get their
+        simulations in turn. After each round the better
+        half of actions by win ratio go on to the next round.
+
+        Checkpoints are saved during rounds too. Resuming one halves the
+        root actions again, starting from their saved statistics.
+
+        See Karnin et al(2013), "Almost optimal exploration in multi-armed
+        bandits" and Cazenave(2015), "Sequential halving applied to trees".
+        """
+        if search_time is None and num_sims is None:
+            raise ValueError("Search needs a time or simulation budget!")
+        start_time = clock()
+        sims_left = float("inf") if num_sims is None else num_sims
+
+        # With fewer simulations than actions, only some actions are tried
+        arms = root.expand_all(self.prior_policy, num_sims)
+        if sims_left < len(arms):
+            arms = arms[:int(sims_left)]
+        for arm in arms:
+            self._simulate(arm)
+        sims_left -= len(arms)
+
+        num_rounds = ceil(log2(len(arms))) if arms else 0
+        for round_num in range(num_rounds):
+            if sims_left <= 0:
+                break
+            rounds_left = num_rounds - round_num
+            round_sims = sims_left / rounds_left
+            round_end = float("inf")
+            if search_time is not None:
+                time_left = search_time - (clock() - start_time)
+                round_end = clock() + time_left / rounds_left
+
+            sims = 0
+            while (sims < round_sims and sims_left > 0 and
+                   clock() < round_end and not _stopped(root, stop_event)):
+                for arm in arms:
+                    selected_node = arm.select(
+                        self.sel_policy, self.prior_policy, self.widening)
+                    self._simulate(selected_node)
+                    sims += 1
+                    sims_left -= 1
+                    if sims >= round_sims or sims_left <= 0:
+                        break
+                if checkpoint is not None:
+                    checkpoint.maybe_save(root)
+
+            arms.sort(key=lambda a: a.win_ratio, reverse=True)
+            arms = arms[:ceil(len(arms) / 2)]
+
+        return arms[0].action if arms else root.get_best_action()
+
+    def _run_simulation(self, root):
+        """Run one select, simulate, backup iteration of MCTS from `root`."""
+        selected_node = root.select(
+            self.sel_policy, self.prior_policy, self.widening)
+        self._simulate(selected_node)
+
+    def _simulate(self, selected_node):
+        """Simulate a game from `selected_node` and back up its result."""
+        trace = None
+        if (getattr(self.backup_policy, "needs_trace", False) or
+                getattr(self.sim_policy, "needs_trace", False)):
+            trace = []
+        result = selected_node.simulate_game(
+            self.sim_policy, trace, self.rollout_depth)
+        if hasattr(self.sim_policy, "update"):
+            self.sim_policy.update(selected_node.game, trace, result)
+        if not getattr(self.backup_policy, "needs_trace", False):
+            trace = None
+        selected_node.backup_result(result, self.backup_policy, trace)
+
+
+def _policy_key(policy, _seen=frozenset()):
+    """
+    Identify a policy, so searches with different policies aren't mixed up.
+
+    Policies with a `cache_key` attribute are identified by it. Functions
+    are identified by name along with the values they close over and their
+    defaults, partials by their function and arguments, and any other
+    policy objects by themselves.
+    """
+    if policy is None:
+        return None
+    key = getattr(policy, "cache_key", None)
+    if key is not None:
+        return key
+    _seen = _seen | {id(policy)}
+    if isinstance(policy, partial):
+        return (_policy_key(policy.func, _seen),
+                _value_key(policy.args, _seen),
+                _value_key(sorted(policy.keywords.items()), _seen))
+    name = getattr(policy, "__qualname__", None)
+    if name is None:
+        return id(policy)
+    name = policy.__module__ + "." + name
+    cells = getattr(policy, "__closure__", None) or ()
+    defaults = getattr(policy, "__defaults__", None) or ()
+    if not cells and not defaults:
+        return name
+    values = []
+    for cell in cells:
+        try:
+            values.append(cell.cell_contents)
+        except ValueError:
+            # The variable isn't assigned yet
+            values.append(None)
+    return (name, _value_key(values, _seen), _value_key(defaults, _seen))
+
+
+def _value_key(value, seen):
+    """Hashable key of a value a policy depends on, see `_policy_key`."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_value_key(v, seen) for v in value)
+    if callable(value):
+        # Recursive functions close over themselves
+        return id(value) if id(value) in seen else _policy_key(value, seen)
+    try:
+        hash(value)
+    except TypeError:
+        return id(value)
+    return value
+
+
+def _stopped(root, stop_event):
+    """Whether a search should stop early, as soon as it has an action."""
+    return (stop_event is not None and bool(root.children) and
+            stop_event.is_set())
+
+
+def _deadline(search_time):
+    """The wall clock time a search of `search_time` seconds must end by."""
+    return None if search_time is None else time() + search_time
+
+
+def _budget_left(deadline, num_sims):
+    """
+    The search time and simulations left for a search that must end by
+    `deadline`. Once it is past, only one simulation is left.
+    """
+    if deadline is None:
+        return None, num_sims
+    search_time = deadline - time()
+    if search_time <= 0:
+        return None, 1
+    return search_time, num_sims
@@ -5,6 +5,9 @@ All policies should be represented as a function that takes a MCTree and
 the result of a game, and updates a node accordingly. Backup policies dictate
 how the results of simulated games affect game states beforehand. See the main
 Mopy module and MCTree for more details on how policies are incorporated.
+
+Policies that set a truthy `needs_trace` attribute are also passed the set of
+(player, action) pairs played from a node onward during each simulation.
 """
 
 
@@ -16,7 +19,57 @@ def win_loss_ratio(node, winner):
         node (MCTree): The current node during backpropagation phase of MCTS.
         winner (int): Zero-indexed integer representing winner of a simulated
             game which is currently being backpropagated up the tree.
+            May also be a float between 0 and 1 for estimated results of
+            two player games, in which case the node gets partial wins.
     """
     node.total_games += 1
-    if node.state.current_player != winner:
-        node.won_games += 1
+    node.won_games += 1 - win_share(winner, node.state.current_player)
+
+
+def rave(node, winner, played=()):
+    """
+    Policy to update win/loss and All-Moves-As-First (AMAF) statistics.
+
+    Args:
+        node (MCTree): The current node during backpropagation phase of MCTS.
+        winner (int): Zero-indexed integer representing winner of a simulated
+            game which is currently being backpropagated up the tree.
+        played (Optional[set[Tuple(int, Action)]]): The (player, action)
+            pairs played from `node` onward in the simulated game.
+            Defaults to no actions (only the win/loss ratio is updated).
+
+    Notes:
+        Every child of `node` whose action was played later in the game by
+        the player to move at `node` has its AMAF statistics updated, as if
+        the action had been played first. Use this with the RAVE selection
+        policy. See Gelly and Silver(2011), "Monte-Carlo tree search and
+        rapid action value estimation in computer Go".
+    """
+    win_loss_ratio(node, winner)
+    player = node.state.current_player
+    for c in node.children:
+        if (player, c.action) in played:
+            c.amaf_total_games += 1
+            c.amaf_won_games += win_share(winner, player)
+
+
+rave.needs_trace = True
+
+
+def win_share(winner, player):
+    """
+    How much of a simulated game `player` won.
+
+    Args:
+        winner (int): Zero-indexed integer representing winner of a simulated
+            game, or a float between 0 and 1 for estimated results of two
+            player games (see Game.evaluate).
+        player (int): Zero-indexed integer representing the player.
+
+    Returns:
+        1 if `player` won and 0 if not. For estimated results, the chance
+        that `player` won.
+    """
+    if isinstance(winner, float):
+        return 1 - abs(winner - player)
+    return 1 if winner == player else 0
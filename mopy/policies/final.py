@@ -0,0 +1,64 @@
+"""
+Contains final action selection policies for MCTS.
+
+All policies should be represented as a function that takes a MCTree and
+returns one of its children. Final policies decide which action is returned
+once a search is complete. See the main Mopy module and MCTree for more
+details on how policies are incorporated.
+
+See Chaslot et al(2008), "Progressive strategies for Monte-Carlo tree search"
+for a comparison of these policies.
+"""
+
+from operator import attrgetter
+
+
+def max_ratio(node):
+    """
+    Policy to choose the child with the best win/loss ratio. Default policy.
+
+    Args:
+        node (MCTree): The root node of a completed search.
+
+    Returns:
+        MCTree representing the child of `node` with the best win ratio.
+    """
+    return max(node.children, key=attrgetter("win_ratio"))
+
+
+def max_visits(node):
+    """
+    Policy to choose the most simulated child, also called the robust child.
+
+    Args:
+        node (MCTree): The root node of a completed search.
+
+    Returns:
+        MCTree representing the child of `node` with the most simulations.
+
+    Notes:
+        Less sensitive than max_ratio to children with few simulations and
+        lucky results.
+    """
+    return max(node.children, key=attrgetter("total_games"))
+
+
+def robust_max(node):
+    """
+    Policy to choose the child with both the most simulations and best ratio.
+
+    Args:
+        node (MCTree): The root node of a completed search.
+
+    Returns:
+        MCTree representing the child of `node` with the most simulations
+        and the best win ratio. If no child has both, the child with the
+        most simulations is chosen.
+    """
+    most_visited = max_visits(node)
+    best_ratio = max_ratio(node)
+    if best_ratio.win_ratio > most_visited.win_ratio:
+        # Only choose the best ratio if it's just as well explored
+        if best_ratio.total_games >= most_visited.total_games:
+            return best_ratio
+    return most_visited
@@ -0,0 +1,26 @@
+"""
+Contains action prior policies for MCTS.
+
+All policies should be represented as a function that takes a Game, State and
+list of Actions legal in that state, and returns a list of non-negative
+weights, one per action. Weights are normalized into prior probabilities.
+Prior policies are computed once per node, and determine the order in which
+actions are expanded and how selection policies such as PUCT weigh children.
+See the main Mopy module and MCTree for more details on how policies are
+incorporated.
+"""
+
+
+def uniform(game, state, actions):
+    """
+    Policy giving every action the same prior probability.
+
+    Args:
+        game (Game): The game that can operate on actions and states.
+        state (State): The current state of a `game` instance.
+        actions (list[Action]): The actions to weigh.
+
+    Returns:
+        list[float] with the same weight for each of `actions`.
+    """
+    return [1.0] * len(actions)
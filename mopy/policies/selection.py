@@ -46,6 +46,69 @@ def UCT(node, explore_rate=0.2):
     return node.children[selected_i]
 
 
+def RAVE(node, explore_rate=0.2, equivalence=1000):
+    """
+    Policy to select children nodes based on UCT blended with AMAF values.
+
+    Args:
+        node (MCTree): The current node during selection phase of MCTS.
+        explore_rate (Optional[float]): Constant representing the exploration
+            rate, as in UCT. Defaults to 0.2.
+        equivalence (Optional[float]): Number of visits at which a child's
+            own win ratio and its AMAF ratio are weighted about equally.
+            Higher values trust AMAF statistics for longer. Defaults to 1000.
+
+    Returns:
+        MCTree representing the child of `node` selected by RAVE criteria.
+
+    Notes:
+        Requires the rave backup policy to collect AMAF statistics.
+        See Gelly and Silver(2011), "Monte-Carlo tree search and rapid
+        action value estimation in computer Go" for the weighting schedule.
+    """
+    def score(c):
+        beta = sqrt(equivalence / (3*c.total_games + equivalence))
+        amaf = 0
+        if c.amaf_total_games > 0:
+            amaf = c.amaf_won_games / c.amaf_total_games
+        val = (1 - beta)*c.win_ratio + beta*amaf
+        par_visits = node.total_games
+        return val + 2*explore_rate*sqrt((2*log(par_visits)) / c.total_games)
+
+    return max(node.children, key=score)
+
+
+def PUCT(node, explore_rate=1.0):
+    """
+    Policy to select children nodes based on PUCT criteria.
+
+    Args:
+        node (MCTree): The current node during selection phase of MCTS.
+        explore_rate (Optional[float]): Constant representing the exploration
+            rate for PUCT. Higher values follow the priors for longer before
+            trusting simulated results. Defaults to 1.0.
+
+    Returns:
+        MCTree representing the child of `node` selected by PUCT criteria.
+
+    Notes:
+        Exploration of each child is scaled by its prior probability, as
+        computed by a prior policy when `node` was first expanded. Without
+        priors every action is treated as equally likely.
+        See Silver et al(2017), "Mastering the game of Go without human
+        knowledge" for the variant used here.
+    """
+    num_actions = len(node.children) + len(node.untried_actions or ())
+    uniform = 1 / num_actions
+    C = explore_rate * sqrt(node.total_games)
+
+    def score(c):
+        prior = uniform if c.prior is None else c.prior
+        return c.win_ratio + C*prior / (1 + c.total_games)
+
+    return max(node.children, key=score)
+
+
 def epsilon_greedy(node, explore_rate=0.2, exploit_rate=0.2):
     """
     Policy to select children nodes based on greedy epsilon criteria.
@@ -5,9 +5,16 @@ All policies should be represented as a function that takes a Game and State
 and returns an Action. Simulation policies determine which actions are taken
 during game simulation phases of MCTS. See the main Mopy module and MCTree
 for more details on how policies are incorporated.
+
+Policies may also be objects that keep state between simulations. If such a
+policy has an `update` method, Mopy calls it with the Game, the
+(player, action) trace and the winner after every simulated game.
 """
 
-from random import choice
+from itertools import accumulate
+from math import exp
+from random import random, choices
+from mopy.policies.backup import win_share
 
 
 def random_action(game, state):
@@ -22,5 +29,108 @@ def random_action(game, state):
         Action representing a legal action that can be taken from `state`.
         Chosen uniformly at random.
     """
-    all_actions = game.get_legal_actions(state)
-    return choice(all_actions)
+    return game.sample_random_action(state)
+
+
+class MAST(object):
+    """
+    Move-Average Sampling Technique policy. Learns action values globally.
+
+    Every action keeps a single value, shared by all states, which is the
+    ratio of simulated games won by the player who took it. Actions with
+    higher values are then chosen more often during later simulations.
+    The table lives as long as the policy object, so reusing one Mopy
+    instance keeps what was learned across searches.
+
+    See Finnsson and Bjornsson(2008), "Simulation-based approach to general
+    game playing" for more information.
+    """
+
+    needs_trace = True
+
+    def __init__(self, temperature=1.0, epsilon=None, initial_value=1.0):
+        """
+        Set up an empty action value table.
+
+        Args:
+            temperature (Optional[float]): Temperature of Gibbs sampling.
+                Lower values bias action choice more strongly toward high
+                values. Defaults to 1.0.
+            epsilon (Optional[float]): If given, use epsilon-greedy sampling
+                instead of Gibbs sampling: with probability `epsilon` take
+                a uniformly random action, otherwise the best valued one.
+                Defaults to None (Gibbs sampling).
+            initial_value (Optional[float]): Value of actions which haven't
+                been seen yet. Defaults to 1.0 (optimistic, so every action
+                gets tried).
+        """
+        self.temperature = temperature
+        self.epsilon = epsilon
+        self.initial_value = initial_value
+        self.wins = {}
+        self.visits = {}
+        # Gibbs weights of actions by id, dropped whenever values change
+        self._weights = {}
+
+    def value(self, action_id):
+        """float: The learned value of the action with id `action_id`."""
+        visits = self.visits.get(action_id)
+        if not visits:
+            return self.initial_value
+        return self.wins[action_id] / visits
+
+    def update(self, game, trace, winner):
+        """
+        Update action values with the result of a simulated game.
+
+        Args:
+            game (Game): The game that was simulated.
+            trace (list[Tuple(int, Action)]): The (player, action) pairs
+                of the simulated game, as recorded by MCTree.simulate_game.
+            winner (int): Zero-indexed integer representing the winner of
+                the simulated game, or a float between 0 and 1 if the result
+                was estimated.
+        """
+        wins, visits, weights = self.wins, self.visits, self._weights
+        for player, action in trace:
+            action_id = game.get_action_id(action)
+            visits[action_id] = visits.get(action_id, 0) + 1
+            won = win_share(winner, player)
+            wins[action_id] = wins.get(action_id, 0) + won
+            weights.pop(action_id, None)
+
+    def weight(self, action_id):
+        """float: The sampling weight of the action with id `action_id`."""
+        weight = self._weights.get(action_id)
+        if weight is None:
+            # Values are win ratios, so shifting by the largest possible
+            # value keeps every weight at most 1
+            top = max(1.0, self.initial_value)
+            weight = exp((self.value(action_id) - top) / self.temperature)
+            self._weights[action_id] = weight
+        return weight
+
+    def __call__(self, game, state):
+        """
+        Choose an action from `state`, biased toward high valued actions.
+
+        Epsilon-greedy sampling only builds the legal actions on greedy
+        steps, so exploring steps cost as little as random_action. Gibbs
+        weights are cached per action, and only recalculated for actions
+        whose values changed since.
+        """
+        if self.epsilon is not None and random() < self.epsilon:
+            return game.sample_random_action(state)
+
+        actions = game.get_legal_actions(state)
+        if self.epsilon is not None:
+            values = [self.value(game.get_action_id(a)) for a in actions]
+            return actions[values.index(max(values))]
+
+        cum_weights = list(accumulate(
+            self.weight(game.get_action_id(a)) for a in actions))
+        if not cum_weights[-1]:
+            # Every weight underflowed, which only very low temperatures do
+            return max(actions, key=lambda a: self.value(
+                game.get_action_id(a)))
+        return choices(actions, cum_weights=cum_weights)[0]
@@ -0,0 +1,84 @@
+"""
+This module is responsible for searching many positions at once.
+
+A SearchPool keeps worker processes alive between batches of searches, each
+with its own copy of the game and the configured Mopy, so a batch only sends
+states to the workers and actions back. Workers take the next position as
+soon as they finish one, which keeps every core busy even when some searches
+end early (such as positions answered by a book).
+"""
+
+from multiprocessing import Pool
+
+# The game and search of each worker process, set once when it starts
+_worker_game = None
+_worker_mopy = None
+
+
+class SearchPool(object):
+    """A persistent pool of processes searching independent positions."""
+
+    def __init__(self, mopy, game, num_workers=None):
+        """
+        Start the worker processes.
+
+        Args:
+            mopy (Mopy): The configured search every worker runs.
+            game (Game): The game every position belongs to.
+            num_workers (Optional[int]): How many processes to start.
+                Defaults to None (one per CPU core).
+        """
+        self._pool = Pool(num_workers, _init_worker, (mopy, game))
+
+    def search_many(self, states, search_time=0.5, num_sims=None,
+                    return_result=False, chunksize=1):
+        """
+        Search for the best action from each of `states`.
+
+        Args:
+            states (iterable[State]): The positions to search. They are sent
+                to workers as they free up, so this may be a generator.
+            search_time (Optional[float]): Seconds to search each position.
+                Defaults to half a second (0.5).
+            num_sims (Optional[int]): Most simulations for each position.
+                Defaults to None (no limit).
+            return_result (Optional[bool]): If True, yield SearchResults
+                instead of actions. Defaults to False.
+            chunksize (Optional[int]): How many positions a worker takes at
+                a time. Larger chunks cost less to send but balance the work
+                worse. Defaults to 1.
+
+        Yields:
+            Tuple(int, Action) of the index of each position in `states` and
+            its best action (or SearchResult), in the order searches finish.
+        """
+        jobs = ((i, state, search_time, num_sims, return_result)
+                for i, state in enumerate(states))
+        return self._pool.imap_unordered(_search_position, jobs, chunksize)
+
+    def close(self):
+        """Stop the worker processes once they're done."""
+        self._pool.close()
+        self._pool.join()
+
+    def terminate(self):
+        """Stop the worker processes immediately."""
+        self._pool.terminate()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.terminate()
+
+
+def _init_worker(mopy, game):
+    global _worker_mopy, _worker_game
+    _worker_mopy, _worker_game = mopy, game
+
+
+def _search_position(job):
+    i, state, search_time, num_sims, return_result = job
+    return i, _worker_mopy.search(_worker_game, state, search_time,
+                                  num_sims, return_result)
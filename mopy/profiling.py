@@ -0,0 +1,197 @@
+"""
+This module is responsible for profiling MCTS searches.
+
+When profiling is enabled, Mopy wraps the searched game in a ProfiledGame and
+grows a tree of ProfiledTree nodes instead of plain MCTree nodes. Both record
+wall time and call counts into a shared SearchProfile. When profiling is
+disabled none of these classes are used, so searches run exactly as before.
+"""
+
+from collections import defaultdict
+from time import perf_counter
+from mopy.game import Game
+from mopy.mctree import MCTree
+
+
+class SearchProfile(object):
+    """Timings and counters collected during one or more searches."""
+
+    PHASES = ("select", "expand", "simulate", "backup")
+
+    def __init__(self):
+        """
+        Set up an empty profile.
+
+        Attributes:
+            phase_times (dict[str, float]): Seconds spent in each MCTS phase.
+                Selection time excludes the expansions it triggered.
+            game_times (dict[str, float]): Seconds spent in each Game method.
+            game_calls (dict[str, int]): Number of calls of each Game method.
+            counters (dict[str, int]): Everything else we count, such as
+                simulations, nodes created, deepcopies and rollout actions.
+                Deepcopies count every state copy of the search, including
+                warm starts and the default Game.evaluate playouts.
+            max_depth (int): Deepest node selected for simulation.
+            max_rollout_length (int): Most actions in a single simulation.
+            wall_time (float): Seconds spent searching, summed over workers.
+            num_workers (int): How many searches were merged into this one.
+        """
+        self.phase_times = dict.fromkeys(SearchProfile.PHASES, 0.0)
+        self.game_times = defaultdict(float)
+        self.game_calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.max_depth = 0
+        self.max_rollout_length = 0
+        self.wall_time = 0.0
+        self.num_workers = 1
+
+    def merge(self, other):
+        """
+        Add the timings and counters of `other` into this profile.
+
+        Args:
+            other (SearchProfile): Profile of another search, such as one
+                of the workers of a parallel search.
+        """
+        for phase, t in other.phase_times.items():
+            self.phase_times[phase] += t
+        for name, t in other.game_times.items():
+            self.game_times[name] += t
+        for name, n in other.game_calls.items():
+            self.game_calls[name] += n
+        for name, n in other.counters.items():
+            self.counters[name] += n
+        self.max_depth = max(self.max_depth, other.max_depth)
+        self.max_rollout_length = max(self.max_rollout_length,
+                                      other.max_rollout_length)
+        self.wall_time += other.wall_time
+        self.num_workers += other.num_workers
+
+    def to_dict(self):
+        """
+        Report the profile as plain data, ready to be serialized.
+
+        Returns:
+            dict of only strings, numbers and nested dicts of those.
+        """
+        counters = dict(self.counters)
+        simulations = counters.get("simulations", 0)
+        report = {
+            "wall_time": self.wall_time,
+            "num_workers": self.num_workers,
+            "phase_times": dict(self.phase_times),
+            "game_times": dict(self.game_times),
+            "game_calls": dict(self.game_calls),
+            "counters": counters,
+            "max_depth": self.max_depth,
+            "max_rollout_length": self.max_rollout_length,
+            "mean_depth": 0.0,
+            "mean_rollout_length": 0.0,
+        }
+        if simulations:
+            report["mean_depth"] = counters["total_depth"] / simulations
+            report["mean_rollout_length"] = (
+                counters["rollout_actions"] / simulations)
+        return report
+
+
+class ProfiledGame(object):
+    """
+    Wraps a Game to time and count calls of its methods.
+
+    Every method of the wrapped game is available. The methods in TIMED
+    record their call counts and wall time into `profile`.
+    """
+
+    TIMED = ("get_legal_actions", "do_action", "is_over", "get_result",
+             "sample_random_action", "get_distinct_actions", "evaluate")
+
+    def __init__(self, game, profile):
+        """
+        Args:
+            game (Game): The game to profile.
+            profile (SearchProfile): Where to record timings.
+        """
+        self.game = game
+        self.profile = profile
+
+    def __getattr__(self, name):
+        # Only called for attributes we don't have. Guard against lookups
+        # before __init__ has run, such as during unpickling.
+        if name.startswith("__") or name in ("game", "profile"):
+            raise AttributeError(name)
+        attr = getattr(self.game, name)
+        if name not in ProfiledGame.TIMED:
+            return attr
+
+        profile = self.profile
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            result = attr(*args, **kwargs)
+            profile.game_times[name] += perf_counter() - start
+            profile.game_calls[name] += 1
+            if (name == "evaluate" and
+                    getattr(attr, "__func__", None) is Game.evaluate):
+                # The default evaluation plays out from a copy
+                profile.counters["deepcopies"] += 1
+            return result
+        return timed
+
+
+class ProfiledTree(MCTree):
+    """
+    A MCTree node that records how long each MCTS phase takes.
+
+    The game of every ProfiledTree must be a ProfiledGame, whose profile
+    the timings are recorded into.
+    """
+
+    def select(self, *args, **kwargs):
+        profile = self.game.profile
+        expand_before = profile.phase_times["expand"]
+        start = perf_counter()
+        node = super().select(*args, **kwargs)
+        elapsed = perf_counter() - start
+        expand_time = profile.phase_times["expand"] - expand_before
+        profile.phase_times["select"] += elapsed - expand_time
+
+        depth, parent = 0, node.parent
+        while parent is not None:
+            depth, parent = depth + 1, parent.parent
+        profile.counters["total_depth"] += depth
+        profile.max_depth = max(profile.max_depth, depth)
+        return node
+
+    def simulate_game(self, *args, **kwargs):
+        profile = self.game.profile
+        actions_before = profile.game_calls["do_action"]
+        start = perf_counter()
+        result = super().simulate_game(*args, **kwargs)
+        profile.phase_times["simulate"] += perf_counter() - start
+
+        length = profile.game_calls["do_action"] - actions_before
+        profile.counters["simulations"] += 1
+        profile.counters["rollout_actions"] += length
+        profile.counters["deepcopies"] += 1
+        profile.max_rollout_length = max(profile.max_rollout_length, length)
+        return result
+
+    def backup_result(self, *args, **kwargs):
+        start = perf_counter()
+        super().backup_result(*args, **kwargs)
+        self.game.profile.phase_times["backup"] += perf_counter() - start
+
+    def backup_results(self, *args, **kwargs):
+        start = perf_counter()
+        super().backup_results(*args, **kwargs)
+        self.game.profile.phase_times["backup"] += perf_counter() - start
+
+    def _expand(self):
+        profile = self.game.profile
+        start = perf_counter()
+        node = super()._expand()
+        profile.phase_times["expand"] += perf_counter() - start
+        profile.counters["nodes_created"] += 1
+        profile.counters["deepcopies"] += 1
+        return node
@@ -0,0 +1,121 @@
+"""This module contains the detailed result of a MCTS search."""
+
+from collections import namedtuple
+from operator import attrgetter
+
+
+ActionStats = namedtuple("ActionStats",
+                         ["action", "visits", "wins", "win_ratio"])
+ActionStats.__doc__ = "Simulation statistics of one action from the root."
+
+
+class SearchResult(object):
+    """
+    Everything we know about a completed search, beyond the chosen action.
+
+    Returned by Mopy searches when asked for. Useful to tune budgets,
+    policies and worker counts.
+    """
+
+    def __init__(self, root, action, elapsed, workers=None):
+        """
+        Collect the statistics of a search tree.
+
+        Args:
+            root (MCTree): The root of the completed search tree. For
+                parallel searches, the tree all workers were combined into.
+            action (Action): The action chosen by the search.
+            elapsed (float): Wall time the search took in seconds.
+            workers (Optional[list[SearchResult]]): Results of each worker
+                of a parallel search. Defaults to None (serial search).
+
+        Attributes:
+            action (Action): The action chosen by the search.
+            children (list[ActionStats]): Statistics of each explored action
+                from the root, most simulated first.
+            principal_variation (list[Action]): The most simulated line of
+                play from the root.
+            max_depth (int): Depth of the deepest node in the tree.
+            mean_depth (float): Average depth of all nodes below the root.
+            num_nodes (int): How many nodes the tree has, root included.
+            total_simulations (float): Simulations backed up to the root.
+            elapsed (float): Wall time the search took in seconds.
+            sims_per_second (float): Simulations per second of wall time.
+            workers (list[SearchResult]): Per-worker results of a parallel
+                search. Empty for serial searches.
+
+        Notes:
+            The tree of a parallel search only holds the combined children
+            of the root, so its depth statistics come from the workers.
+        """
+        self.action = action
+        self.children = sorted(
+            (ActionStats(c.action, c.total_games, c.won_games, c.win_ratio)
+             for c in root.children),
+            key=attrgetter("visits"), reverse=True)
+        self.principal_variation = []
+        node = root
+        while node.children:
+            node = max(node.children, key=attrgetter("total_games"))
+            self.principal_variation.append(node.action)
+
+        self.workers = workers or []
+        self.total_simulations = root.total_games
+        if self.workers:
+            self.total_simulations = sum(
+                w.total_simulations for w in self.workers)
+            self._collect_worker_depths()
+        else:
+            self._collect_depths(root)
+        self.elapsed = elapsed
+        self.sims_per_second = 0.0
+        if elapsed > 0:
+            self.sims_per_second = self.total_simulations / elapsed
+
+    def _collect_depths(self, root):
+        self.max_depth, self.num_nodes = 0, 1
+        total_depth = 0
+        stack = [(c, 1) for c in root.children]
+        while stack:
+            node, depth = stack.pop()
+            self.num_nodes += 1
+            total_depth += depth
+            self.max_depth = max(self.max_depth, depth)
+            stack.extend((c, depth + 1) for c in node.children)
+        self.mean_depth = 0.0
+        if self.num_nodes > 1:
+            self.mean_depth = total_depth / (self.num_nodes - 1)
+
+    def _collect_worker_depths(self):
+        self.max_depth = max(w.max_depth for w in self.workers)
+        self.num_nodes = sum(w.num_nodes for w in self.workers)
+        below_root = sum(w.num_nodes - 1 for w in self.workers)
+        self.mean_depth = 0.0
+        if below_root:
+            self.mean_depth = sum(
+                w.mean_depth * (w.num_nodes - 1)
+                for w in self.workers) / below_root
+
+    def to_dict(self):
+        """
+        Report the result as plain data, ready to be serialized.
+
+        Returns:
+            dict of only strings, numbers, lists and nested dicts of those.
+            Actions are reported by their string representation.
+        """
+        return {
+            "action": str(self.action),
+            "children": [
+                {"action": str(c.action), "visits": c.visits,
+                 "wins": c.wins, "win_ratio": c.win_ratio}
+                for c in self.children],
+            "principal_variation": [str(a) for a in self.principal_variation],
+            "max_depth": self.max_depth,
+            "mean_depth": self.mean_depth,
+            "num_nodes": self.num_nodes,
+            "total_simulations": self.total_simulations,
+            "elapsed": self.elapsed,
+            "sims_per_second": self.sims_per_second,
+            "workers": [w.to_dict() for w in self.workers],
+        }
@@ -0,0 +1,285 @@
+"""
+This module is responsible for saving and loading search trees compactly.
+
+A tree is stored as flat arrays with one entry per node, in breadth-first
+order so the children of every node are contiguous:
+
+    won_games       float64   simulated games won
+    total_games     float64   simulated games played
+    action_ids      int64     Game.get_action_id of the node's action
+    first_child     uint32    index of the first child
+    num_children    uint32    how many children follow it
+
+The arrays follow a 16 byte header, 8 byte arrays first, so every array is
+aligned to its item size. Everything is little-endian. States, priors and
+All-Moves-As-First statistics are not stored: states are rebuilt by
+replaying actions from the root state when a tree is fully loaded.
+
+CompactTree reads the arrays in place (from bytes or a memory-mapped file),
+so huge trees can be queried without building any MCTree nodes.
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from collections import deque
+from copy import deepcopy
+from mopy.game import Game
+from mopy.mctree import MCTree
+from mopy.profiling import ProfiledGame
+
+MAGIC = b"MOPY"
+VERSION = 1
+# Magic, version, reserved, number of nodes
+HEADER = struct.Struct("<4sHHQ")
+ARRAYS = (("won_games", "d"), ("total_games", "d"), ("action_ids", "q"),
+          ("first_child", "I"), ("num_children", "I"))
+ROOT_ACTION_ID = -1
+
+
+def dumps(root, max_depth=None):
+    """
+    Serialize the tree below `root`.
+
+    Args:
+        root (MCTree): The node to save, along with its descendants.
+        max_depth (Optional[int]): Only save nodes up to this many actions
+            below `root`. Defaults to None (save the whole tree).
+
+    Returns:
+        bytes of the compact tree.
+    """
+    game = root.game
+    columns = {name: array(code) for name, code in ARRAYS}
+    queue = deque([(root, 0)])
+    next_index = 1
+    while queue:
+        node, depth = queue.popleft()
+        children = node.children
+        if max_depth is not None and depth >= max_depth:
+            children = []
+        action_id = ROOT_ACTION_ID
+        if node is not root:
+            action_id = game.get_action_id(node.action)
+        columns["won_games"].append(node.won_games)
+        columns["total_games"].append(node.total_games)
+        columns["action_ids"].append(action_id)
+        columns["first_child"].append(next_index)
+        columns["num_children"].append(len(children))
+        next_index += len(children)
+        queue.extend((c, depth + 1) for c in children)
+
+    chunks = [HEADER.pack(MAGIC, VERSION, 0, next_index)]
+    for name, _ in ARRAYS:
+        if sys.byteorder == "big":
+            columns[name].byteswap()
+        chunks.append(columns[name].tobytes())
+    return b"".join(chunks)
+
+
+def dumps_root_actions(root):
+    """
+    Serialize the statistics of the actions at `root`, to combine searches.
+
+    Returns:
+        bytes of the compact tree of `root` and its children if the game
+        implements `get_action_from_id` (see `has_action_ids`). Otherwise,
+        list[Tuple(Action, float, float)] of the (action, visits, wins) of
+        each child, to be pickled instead.
+    """
+    if has_action_ids(root.game):
+        return dumps(root, max_depth=1)
+    return [(c.action, c.total_games, c.won_games) for c in root.children]
+
+
+def has_action_ids(game):
+    """Whether `game` implements `get_action_from_id`, to load trees with."""
+    if isinstance(game, ProfiledGame):
+        game = game.game
+    return type(game).get_action_from_id is not Game.get_action_from_id
+
+
+def save(root, path, max_depth=None):
+    """Serialize the tree below `root` into the file at `path`."""
+    with open(path, "wb") as f:
+        f.write(dumps(root, max_depth))
+
+
+def loads(data, game, state, tree_class=MCTree):
+    """
+    Rebuild a full search tree from its serialized form.
+
+    Args:
+        data (bytes-like): A tree serialized by `dumps` or `save`.
+        game (Game): The game the tree was searched on. It must implement
+            `get_action_from_id`.
+        state (State): The state at the root of the tree.
+        tree_class (Optional[type]): The MCTree class to build nodes with.
+            Defaults to MCTree.
+
+    Returns:
+        MCTree of the root, with states of every node rebuilt by replaying
+        actions from `state`.
+    """
+    with CompactTree(data, game) as compact:
+        root = tree_class(game, state)
+        _copy_stats(compact.root, root)
+        stack = [(compact.root, root)]
+        while stack:
+            compact_node, node = stack.pop()
+            for compact_child in compact_node.children:
+                action = compact_child.action
+                child_state = deepcopy(node.state)
+                game.do_action(child_state, action)
+                child = tree_class(game, child_state, action, parent=node)
+                _copy_stats(compact_child, child)
+                node.children.append(child)
+                stack.append((compact_child, child))
+    return root
+
+
+def load(path, game, state, tree_class=MCTree):
+    """Rebuild a full search tree from the file at `path`."""
+    with open(path, "rb") as f:
+        return loads(f.read(), game, state, tree_class)
+
+
+def _copy_stats(compact_node, node):
+    node.won_games = compact_node.won_games
+    node.total_games = compact_node.total_games
+
+
+class CompactTree(object):
+    """
+    Read-only view of a serialized search tree.
+
+    Nodes are only decoded when they are looked at, so opening a tree costs
+    the same no matter how large it is.
+    """
+
+    def __init__(self, data, game=None):
+        """
+        Args:
+            data (bytes-like): A tree serialized by `dumps`, such as bytes or
+                an mmap.
+            game (Optional[Game]): The game the tree was searched on, used to
+                turn action ids back into actions. Defaults to None (only
+                action ids are available).
+
+        Attributes:
+            num_nodes (int): How many nodes the tree has, root included.
+            root (CompactNode): The root of the tree.
+        """
+        magic, version, _, num_nodes = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a version %d mopy tree!" % VERSION)
+        self.game = game
+        self.num_nodes = num_nodes
+        self._data = data
+        self._views = []
+        offset = HEADER.size
+        for name, code in ARRAYS:
+            size = array(code).itemsize * num_nodes
+            view = memoryview(data)[offset:offset + size]
+            if sys.byteorder == "big":
+                column = array(code, view)
+                column.byteswap()
+            else:
+                column = view.cast(code)
+                self._views.extend([view, column])
+            setattr(self, "_" + name, column)
+            offset += size
+        self.root = CompactNode(self, 0)
+
+    @classmethod
+    def open(cls, path, game=None):
+        """
+        Memory-map a tree saved at `path`.
+
+        Returns:
+            CompactTree backed by the file, which should be closed when done.
+        """
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(data, game)
+
+    def close(self):
+        """Release the data of the tree, unmapping it if it was a file."""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CompactNode(object):
+    """
+    A node of a CompactTree.
+
+    Has the attributes of MCTree that describe search results, so it can
+    stand in for one, such as in MCTree.combine_root_actions.
+    """
+
+    __slots__ = ("tree", "index")
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+
+    @property
+    def action_id(self):
+        """int: Id of the action leading to this node, -1 for the root."""
+        return self.tree._action_ids[self.index]
+
+    @property
+    def action(self):
+        """Action: The action leading to this node, None for the root."""
+        if self.index == 0:
+            return None
+        return self.tree.game.get_action_from_id(self.action_id)
+
+    @property
+    def won_games(self):
+        return self.tree._won_games[self.index]
+
+    @property
+    def total_games(self):
+        return self.tree._total_games[self.index]
+
+    @property
+    def win_ratio(self):
+        """float: Represents the w/l ratio of simulated games from self."""
+        total = self.total_games
+        return self.won_games / total if total else 0
+
+    @property
+    def children(self):
+        """list[CompactNode]: Saved children of this node."""
+        first = self.tree._first_child[self.index]
+        count = self.tree._num_children[self.index]
+        return [CompactNode(self.tree, i) for i in range(first, first + count)]
+
+    def find_child(self, action_id):
+        """
+        Get the child reached by an action.
+
+        Args:
+            action_id (int): Game.get_action_id of the action.
+
+        Returns:
+            CompactNode of the child, or None if it was not saved.
+        """
+        first = self.tree._first_child[self.index]
+        count = self.tree._num_children[self.index]
+        ids = self.tree._action_ids
+        for i in range(first, first + count):
+            if ids[i] == action_id:
+                return CompactNode(self.tree, i)
+        return None
@@ -0,0 +1,81 @@
+from mopy.mopy import Mopy
+from mopy.arena import (Arena, ArenaStats, Contestant, GameRecord, SPRT,
+                        play_game)
+from mopy.impl.nim.game import NimGame
+import pytest
+
+
+class SoloNimGame(NimGame):
+    """Nim where the second player always has to pass."""
+
+    def do_action(self, state, action):
+        state.take(action.heap_num, action.num_taken)
+
+    def get_result(self, state):
+        return 0
+
+
+def record(score, first=0):
+    return GameRecord(0, first, score, (2, 1), (1.0, 2.0), (1.0, 2.0))
+
+
+def test_stats():
+    stats = ArenaStats()
+    for score in [1, 1, 0, 0.5]:
+        stats.add(record(score))
+    assert (stats.wins, stats.losses, stats.draws) == (2, 1, 1)
+    assert stats.score == pytest.approx(0.625)
+    assert stats.num_moves == [8, 4]
+    assert stats.cpu_per_move() == [0.5, 2.0]
+
+
+def test_moves_with_passes():
+    contestants = [Contestant(Mopy(), search_time=None, num_sims=5)] * 2
+    record = play_game(SoloNimGame([3, 4]), contestants, game_num=1)
+    assert record.num_moves[0] == 0
+    assert record.num_moves[1] > 0
+
+
+def test_interval():
+    stats = ArenaStats()
+    assert stats.interval() == (0.0, 1.0)
+    for score in [1] * 8 + [0] * 2:
+        stats.add(record(score))
+    low, high = stats.interval()
+    assert low == pytest.approx(0.4902, abs=1e-4)
+    assert high == pytest.approx(0.9433, abs=1e-4)
+
+
+def test_sprt():
+    stats = ArenaStats(SPRT(elo0=0, elo1=100))
+    assert stats.decision is None
+    for _ in range(40):
+        stats.add(record(1))
+    assert stats.decision == "H1"
+
+    stats = ArenaStats(SPRT(elo0=0, elo1=100))
+    for _ in range(40):
+        stats.add(record(0))
+    assert stats.decision == "H0"
+
+
+def test_match():
+    strong = Contestant(Mopy(), search_time=None, num_sims=300)
+    weak = Contestant(Mopy(), search_time=None, num_sims=1)
+    arena = Arena(NimGame([3, 4, 5]), (strong, weak), num_workers=2)
+    records = list(arena.play(8))
+    assert len(records) == 8
+    assert sorted(r.game_num for r, _ in records) == list(range(8))
+    assert sum(r.first for r, _ in records) == 4
+    stats = records[-1][1]
+    assert stats.games == 8
+    assert stats.score > 0.5
+
+
+def test_match_stops_early():
+    strong = Contestant(Mopy(), search_time=None, num_sims=300)
+    weak = Contestant(Mopy(), search_time=None, num_sims=1)
+    arena = Arena(NimGame([3, 4, 5]), (strong, weak), num_workers=2)
+    stats = arena.run(1000, SPRT(elo0=0, elo1=400, alpha=0.2, beta=0.2))
+    assert stats.decision == "H1"
+    assert stats.games < 1000
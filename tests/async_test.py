@@ -0,0 +1,72 @@
+from mopy.mopy import Mopy
+from mopy.impl.nim.game import NimGame
+from mopy.impl.nim.action import NimAction
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+import asyncio
+import pytest
+
+
+@pytest.fixture
+def game():
+    return NimGame([0, 6])
+
+
+def test_search_async(game):
+    async def serve():
+        searches = [Mopy().search_async(game, game.new_game(), 0.1)
+                    for _ in range(4)]
+        return await asyncio.gather(*searches)
+    assert asyncio.run(serve()) == [NimAction(1, 6)] * 4
+
+
+def test_cancel(game):
+    executor = ThreadPoolExecutor(1)
+
+    async def serve():
+        task = asyncio.ensure_future(Mopy().search_async(
+            game, game.new_game(), search_time=30, executor=executor))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The only thread of the executor is free again
+        return await Mopy().search_async(
+            game, game.new_game(), search_time=None, num_sims=300,
+            executor=executor)
+    start = perf_counter()
+    assert asyncio.run(serve()) == NimAction(1, 6)
+    assert perf_counter() - start < 5
+    executor.shutdown()
+
+
+def test_queued_deadline(game):
+    executor = ThreadPoolExecutor(1)
+
+    async def serve():
+        mopy = Mopy()
+        first = mopy.search_async(game, game.new_game(), 0.3,
+                                  executor=executor)
+        second = mopy.search_async(game, game.new_game(), 0.1,
+                                   return_result=True, executor=executor)
+        return await asyncio.gather(first, second)
+    _, result = asyncio.run(serve())
+    # The second search was queued past its deadline
+    assert result.total_simulations == 1
+    executor.shutdown()
+
+
+def test_parallel_search_async(game):
+    async def serve():
+        task = asyncio.ensure_future(Mopy().parallel_search_async(
+            game, game.new_game(), search_time=60, num_workers=2))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return await Mopy().parallel_search_async(
+            game, game.new_game(), search_time=None, num_sims=40,
+            num_workers=2)
+    start = perf_counter()
+    assert asyncio.run(serve()) == NimAction(1, 6)
+    assert perf_counter() - start < 10
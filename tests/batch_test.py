@@ -0,0 +1,57 @@
+from mopy.impl.nim.state import NimState
+from mopy.impl.nim.game import NimGame
+from mopy.impl.nim.action import NimAction
+from mopy.mopy import Mopy
+import pytest
+
+np = pytest.importorskip("numpy")
+from mopy.impl.nim.batch import NimBatchGame  # noqa: E402
+
+
+@pytest.fixture
+def batch_game(scope="module"):
+    return NimBatchGame(seed=0)
+
+
+@pytest.fixture
+def states():
+    return [NimState([3, 4, 5], 0), NimState([0, 0, 1], 1),
+            NimState([0, 0, 0], 0), NimState([2, 0, 2], 0)]
+
+
+def test_encode(batch_game, states):
+    batch = batch_game.encode_states(states)
+    assert batch.heaps.tolist() == [s.heaps for s in states]
+    assert batch.remaining.tolist() == [12, 1, 0, 4]
+    assert batch_game.is_over(batch).tolist() == [False, False, True, False]
+
+
+def test_sampled_actions_legal(batch_game, states):
+    batch = batch_game.encode_states(states)
+    game = NimGame()
+    active = ~batch_game.is_over(batch)
+    for _ in range(50):
+        heap_nums, num_taken = batch_game.sample_random_actions(batch, active)
+        for i, s in enumerate(states):
+            if active[i]:
+                a = NimAction(int(heap_nums[i]), int(num_taken[i]))
+                assert a in game.get_legal_actions(s)
+
+
+def test_simulate(batch_game, states):
+    batch = batch_game.encode_states(states)
+    results = batch_game.simulate(batch)
+    assert batch_game.is_over(batch).all()
+    assert batch.heaps.sum() == 0
+    # Only one element left, so player 1 takes it and wins
+    assert results[1] == 1
+    # Already complete, so the previous player won
+    assert results[2] == 1
+
+
+def test_batch_search(batch_game):
+    # Taking everything from the only heap is the winning move
+    game = NimGame([0, 5])
+    action = Mopy().batch_search(
+        game, game.new_game(), batch_game, search_time=0.2)
+    assert action == NimAction(1, 5)
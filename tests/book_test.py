@@ -0,0 +1,72 @@
+from mopy.mopy import Mopy
+from mopy.book import OpeningBook, build_book
+from mopy.result import ActionStats
+from mopy.impl.dvonn.action import DvonnAction
+from mopy.impl.dvonn.game import DvonnGame
+from mopy.impl.dvonn.state import Symmetry
+import pytest
+
+
+@pytest.fixture
+def game():
+    return DvonnGame()
+
+
+def place(x, y):
+    return DvonnAction(DvonnAction.Type.PLACE, (x, y))
+
+
+@pytest.fixture
+def state(game):
+    state = game.new_game()
+    game.do_action(state, place(0, 2))
+    return state
+
+
+@pytest.fixture
+def book(game, state):
+    book = OpeningBook()
+    book.add(game, state, [ActionStats(place(1, 1), 100, 80, 0.8),
+                           ActionStats(place(4, 4), 50, 20, 0.4)])
+    return book
+
+
+def test_lookup_equivalent_state(game, book):
+    # Rotating the board gives the same position, so the book applies
+    rotated = game.new_game()
+    game.do_action(rotated, game.transform_action(
+        place(0, 2), Symmetry.ROTATE))
+    stats = book.lookup(game, rotated)
+    assert stats[0] == (game.transform_action(place(1, 1), Symmetry.ROTATE),
+                        100, 80)
+    assert book.lookup(game, game.new_game()) is None
+
+
+def test_save_load(game, state, book, tmp_path):
+    path = str(tmp_path / "dvonn.book")
+    book.save(path)
+    loaded = OpeningBook.load(path)
+    assert loaded.entries == book.entries
+    assert loaded.lookup(game, state) == book.lookup(game, state)
+
+
+def test_book_search(game, state, book):
+    mopy = Mopy(book=book)
+    result = mopy.search(game, state, search_time=None, num_sims=0,
+                         return_result=True)
+    assert result.action == place(1, 1)
+    assert result.total_simulations == 150
+
+
+def test_warm_start(game, state, book):
+    mopy = Mopy(book=book, book_warm_start=15)
+    result = mopy.search(game, state, search_time=None, num_sims=30,
+                         return_result=True)
+    assert result.total_simulations == pytest.approx(45)
+
+
+def test_build_book(game):
+    book = build_book(game, Mopy(), 2, breadth=2, num_workers=2,
+                      search_time=None, num_sims=60)
+    assert len(book) == 3
+    assert book.lookup(game, game.new_game())
@@ -0,0 +1,124 @@
+from mopy.mopy import Mopy
+from mopy.cache import SearchCache
+from mopy.game import Game
+from mopy.impl.nim.game import NimGame
+from mopy.impl.nim.action import NimAction
+from mopy.policies import selection
+from functools import partial
+import pickle
+from threading import Thread
+import pytest
+
+
+@pytest.fixture
+def game():
+    return NimGame([0, 6])
+
+
+def test_lru_eviction(game):
+    cache = SearchCache(max_size=2)
+    states = [NimGame([n]).new_game() for n in range(1, 4)]
+    for s in states[:2]:
+        cache.put(game, s, [(NimAction(0, 1), 1, 1)])
+    # Using the first state makes the second the least recently used
+    assert cache.get(game, states[0]) is not None
+    cache.put(game, states[2], [(NimAction(0, 1), 1, 1)])
+    assert len(cache) == 2
+    assert cache.get(game, states[1]) is None
+    assert cache.get(game, states[0]) is not None
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_config_key(game):
+    cache = SearchCache()
+    state = game.new_game()
+    Mopy(cache=cache).search(game, state, search_time=None, num_sims=50)
+    assert cache.get(game, state, Mopy()._config_key()) is not None
+    rave = Mopy(sel_policy=selection.RAVE)
+    assert cache.get(game, state, rave._config_key()) is None
+
+
+def test_parametrized_policy_keys():
+    def uct(c):
+        def policy(node):
+            return selection.UCT(node, c)
+        return policy
+
+    def keys(**kwargs):
+        return Mopy(**kwargs)._config_key()
+
+    assert keys(sel_policy=uct(1)) == keys(sel_policy=uct(1))
+    assert keys(sel_policy=uct(1)) != keys(sel_policy=uct(2))
+    assert (keys(sel_policy=partial(selection.UCT, explore_rate=1)) !=
+            keys(sel_policy=partial(selection.UCT, explore_rate=2)))
+    keyed = partial(selection.UCT, explore_rate=1)
+    keyed.cache_key = "uct-1"
+    assert keys(sel_policy=keyed)[0] == "uct-1"
+
+
+def test_cached_search(game):
+    cache = SearchCache(min_sims=100)
+    mopy = Mopy(cache=cache)
+    state = game.new_game()
+    result = mopy.search(game, state, search_time=None, num_sims=50,
+                         return_result=True)
+    assert result.total_simulations == 50
+    # Too few simulations to trust, so the position is searched again
+    result = mopy.search(game, state, search_time=None, num_sims=200,
+                         return_result=True)
+    assert result.total_simulations == 200
+    result = mopy.search(game, state, search_time=None, num_sims=50,
+                         return_result=True)
+    assert result.total_simulations == 200
+    assert result.action == NimAction(1, 6)
+
+
+def test_accumulate(game):
+    cache = SearchCache(accumulate=True)
+    mopy = Mopy(cache=cache)
+    state = game.new_game()
+    for _ in range(3):
+        mopy.search(game, state, search_time=None, num_sims=40)
+    stats = cache.get(game, state, mopy._config_key())
+    assert sum(v for _, v, _ in stats) == 120
+
+
+def test_concurrent_accumulate(game):
+    cache = SearchCache(accumulate=True)
+    mopy = Mopy(cache=cache)
+    state = game.new_game()
+
+    def search():
+        for _ in range(5):
+            mopy.search(game, state, search_time=None, num_sims=20)
+    threads = [Thread(target=search) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = cache.get(game, state, mopy._config_key())
+    assert sum(v for _, v, _ in stats) == 400
+
+
+def test_default_canonical_key():
+    class PlainNimGame(NimGame):
+        get_canonical_key = Game.get_canonical_key
+
+    game = PlainNimGame([0, 6])
+    cache = SearchCache()
+    mopy = Mopy(cache=cache)
+    mopy.search(game, game.new_game(), search_time=None, num_sims=50)
+    result = mopy.search(game, game.new_game(), search_time=None,
+                         num_sims=50, return_result=True)
+    assert cache.hits == 1
+    assert result.action == NimAction(1, 6)
+
+
+def test_pickle_cache(game):
+    cache = SearchCache()
+    mopy = Mopy(cache=cache)
+    state = game.new_game()
+    mopy.search(game, state, search_time=None, num_sims=50)
+    copy = pickle.loads(pickle.dumps(mopy))
+    assert copy.cache.get(game, state, copy._config_key()) is not None
+    copy.search(game, state, search_time=None, num_sims=50)
@@ -0,0 +1,60 @@
+from mopy.mopy import Mopy
+from mopy.mctree import MCTree
+from mopy.checkpoint import Checkpointer
+from mopy.impl.nim.game import NimGame
+from mopy.impl.nim.action import NimAction
+from mopy import serialization
+import os
+import pytest
+
+
+@pytest.fixture
+def game():
+    return NimGame([0, 6])
+
+
+def test_checkpointed_search(game, tmp_path):
+    path = str(tmp_path / "search.mopy")
+    mopy = Mopy()
+    mopy.search(game, game.new_game(), search_time=None, num_sims=100,
+                checkpoint_path=path, checkpoint_interval=0)
+    assert os.listdir(str(tmp_path)) == ["search.mopy"]
+    root = serialization.load(path, game, game.new_game())
+    assert root.total_games == 100
+
+
+def test_resume_search(game, tmp_path):
+    path = str(tmp_path / "search.mopy")
+    mopy = Mopy()
+    mopy.search(game, game.new_game(), search_time=None, num_sims=100,
+                checkpoint_path=path)
+    result = mopy.resume_search(game, game.new_game(), path,
+                                search_time=None, num_sims=150,
+                                return_result=True)
+    assert result.total_simulations == 250
+    assert result.action == NimAction(1, 6)
+    root = serialization.load(path, game, game.new_game())
+    assert root.total_games == 250
+
+
+def test_checkpointer_interval(game, tmp_path):
+    path = str(tmp_path / "tree.mopy")
+    root = MCTree(game, game.new_game())
+    checkpoint = Checkpointer(path, interval=3600)
+    checkpoint.maybe_save(root)
+    checkpoint.close()
+    assert checkpoint.num_saved == 0
+    checkpoint.close(root)
+    assert checkpoint.num_saved == 1
+    assert os.path.exists(path)
+
+
+def test_halving_checkpoints(game, tmp_path):
+    path = str(tmp_path / "halving.mopy")
+    root = MCTree(game, game.new_game())
+    checkpoint = Checkpointer(path, interval=0)
+    action = Mopy()._halving_search(root, None, 100, checkpoint=checkpoint)
+    checkpoint.close()
+    assert action == NimAction(1, 6)
+    assert checkpoint.num_saved >= 1
+    assert serialization.load(path, game, game.new_game()).total_games > 0
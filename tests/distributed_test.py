@@ -0,0 +1,88 @@
+from mopy.mopy import Mopy
+from mopy.distributed import WorkerServer
+from mopy.game import Game
+from mopy.impl.nim.game import NimGame
+from mopy.impl.nim.action import NimAction
+from multiprocessing import Process, Queue
+import socket
+import pytest
+
+
+def serve(addresses):
+    with WorkerServer() as server:
+        addresses.put(server.server_address)
+        server.serve_forever()
+
+
+@pytest.fixture(scope="module")
+def workers():
+    addresses = Queue()
+    procs = [Process(target=serve, args=(addresses,), daemon=True)
+             for _ in range(3)]
+    for p in procs:
+        p.start()
+    yield [addresses.get(timeout=10) for _ in procs]
+    for p in procs:
+        p.terminate()
+
+
+class NoIdNimGame(NimGame):
+    """Nim without a way to map action ids back to actions."""
+
+    get_action_from_id = Game.get_action_from_id
+
+
+@pytest.fixture
+def game():
+    return NimGame([0, 6])
+
+
+def test_distributed_search(game, workers):
+    result = Mopy().distributed_search(
+        game, game.new_game(), workers, search_time=None, num_sims=300,
+        return_result=True)
+    assert result.action == NimAction(1, 6)
+    assert result.total_simulations == 300
+
+
+def test_distributed_without_action_ids(workers):
+    game = NoIdNimGame([0, 6])
+    result = Mopy().distributed_search(
+        game, game.new_game(), workers, search_time=None, num_sims=300,
+        return_result=True)
+    assert result.action == NimAction(1, 6)
+    assert result.total_simulations == 300
+
+
+def test_dropped_workers(game, workers):
+    # Nothing listens on a port we freed, and a socket that never accepts
+    # connections stands in for a worker that hangs
+    closed = socket.socket()
+    closed.bind(("127.0.0.1", 0))
+    dead = closed.getsockname()
+    closed.close()
+    hung = socket.socket()
+    hung.bind(("127.0.0.1", 0))
+    hung.listen()
+
+    result = Mopy().distributed_search(
+        game, game.new_game(), workers + [dead, hung.getsockname()],
+        search_time=0.2, timeout=1, return_result=True)
+    assert result.action == NimAction(1, 6)
+    hung.close()
+
+
+def test_no_workers(game):
+    closed = socket.socket()
+    closed.bind(("127.0.0.1", 0))
+    dead = closed.getsockname()
+    closed.close()
+    with pytest.raises(ConnectionError):
+        Mopy().distributed_search(game, game.new_game(), [dead],
+                                  search_time=0.1, timeout=1)
+
+
+def test_empty_workers(game):
+    with pytest.raises(ValueError):
+        Mopy().distributed_search(game, game.new_game(), [],
+                                  search_time=0.1)
@@ -1,5 +1,6 @@
-from mopy.impl.dvonn.state import Cell
+from mopy.impl.dvonn.state import Cell, Board
 from mopy.impl.dvonn.game import DvonnGame
+from copy import deepcopy
 import pytest
 
 
@@ -35,6 +36,7 @@ def full_state(new_state):
         full_state.players[n].num_player_rings = 0
         full_state.players[n].num_dvonn_rings = 0
 
+    full_state.board.refresh_counters()
     return full_state
 
 
@@ -87,3 +89,49 @@ def test_ring_removal(full_state):
 ])
 def test_surround(full_state, test_cell, expected):
     assert full_state.board.is_surrounded(test_cell) == expected
+
+
+@pytest.mark.parametrize("num_rows, num_cols, num_cells", [
+    (5, 11, 49),
+    (7, 15, 93),
+    (1, 4, 4)
+])
+def test_custom_board(num_rows, num_cols, num_cells):
+    board = Board(num_rows, num_cols)
+    assert board.num_cells == num_cells
+    # Every row is one cell shorter than the next row towards the middle
+    for x, row in enumerate(board.grid):
+        row_cells = sum(c.owner != Cell.Owner.NULL for c in row)
+        assert row_cells == num_cols - abs(x - num_rows // 2)
+
+
+def test_long_chain_removal():
+    # One component much larger than the recursion limit
+    board = Board(41, 61)
+    for x, row in enumerate(board.grid):
+        for y, cell in enumerate(row):
+            if cell.owner != Cell.Owner.NULL:
+                board.place_ring(x, y, Cell.Owner.WHITE)
+    assert board.controlled_rings[0] == board.num_cells
+
+    board.remove_isolated_rings()
+    assert not board.occupied
+    assert board.controlled_rings[0] == 0
+    assert board.removed_white_rings == board.num_cells
+
+
+def test_scratch_buffer_reuse(full_state):
+    board = full_state.board
+    occupied = set(board.occupied)
+    for _ in range(3):
+        board.remove_isolated_rings()
+        assert board.occupied == occupied
+
+
+def test_scratch_buffer_not_copied(full_state):
+    board = full_state.board
+    board.remove_isolated_rings()
+    copy = deepcopy(board)
+    assert copy._visited is None
+    copy.remove_isolated_rings()
+    assert copy.occupied == board.occupied
@@ -1,7 +1,9 @@
-from mopy.impl.dvonn.state import Cell
+from mopy.impl.dvonn.state import Cell, Symmetry
 from mopy.impl.dvonn.action import DvonnAction
 from mopy.impl.dvonn.game import DvonnGame
 from copy import deepcopy
+import pickle
+import random
 import pytest
 
 
@@ -44,6 +46,7 @@ def full_state(game, new_state):
     grid[3][10].owner = Cell.Owner.NULL
     grid[4][9].owner = Cell.Owner.NULL
     grid[4][10].owner = Cell.Owner.NULL
+    full_state.board.refresh_counters()
     full_state.legal_actions = game._calculate_legal_actions(full_state)
     return full_state
 
@@ -73,6 +76,7 @@ def completed_state(game, new_state):
     grid[2][6].owner = Cell.Owner.WHITE
     grid[2][6].num_white_rings = 5
     grid[2][6].num_dvonn_rings = 0
+    completed_state.board.refresh_counters()
     actions = game._calculate_legal_actions(completed_state)
     completed_state.legal_actions = actions
 
@@ -183,3 +187,113 @@ def test_game_over(game, new_state, full_state, completed_state):
         game.get_result(full_state)
     with pytest.raises(Exception):
         game.get_result(new_state)
+
+
+def test_symmetries_preserve_board(new_state):
+    grid = new_state.board.grid
+    for sym in Symmetry:
+        for x, row in enumerate(grid):
+            for y, cell in enumerate(row):
+                s_x, s_y = sym.apply(x, y, 5, 11)
+                if cell.owner == Cell.Owner.NULL:
+                    continue
+                assert grid[s_x][s_y].owner == Cell.Owner.EMPTY
+                assert sym.apply(s_x, s_y, 5, 11) == (x, y)
+
+
+def test_distinct_first_actions(game, new_state):
+    # Burnside: (49 + 1 + 11 + 3) / 4 placement orbits on the empty board
+    distinct = game.get_distinct_actions(new_state)
+    assert len(distinct) == 16
+    assert all(a in game.get_legal_actions(new_state) for a in distinct)
+
+    game.do_action(new_state, DvonnAction(DvonnAction.Type.PLACE, (0, 2)))
+    assert len(game.get_distinct_actions(new_state)) == 48
+
+
+@pytest.mark.parametrize("positions", [
+    ([(0, 2), (1, 4)]),
+    ([(2, 5), (3, 0), (4, 8)]),
+])
+def test_canonical_key(game, positions):
+    keys = set()
+    for sym in Symmetry:
+        state = game.new_game()
+        for pos in positions:
+            a = DvonnAction(DvonnAction.Type.PLACE, pos)
+            game.do_action(state, game.transform_action(a, sym))
+        key, canonical_sym = game.get_canonical_key(state)
+        assert key == state.encode(canonical_sym)
+        keys.add(key)
+    assert len(keys) == 1
+
+
+def test_running_counters(game):
+    random.seed(0)
+    for _ in range(5):
+        state = game.new_game()
+        while not game.is_over(state):
+            game.do_action(state, game.sample_random_action(state))
+            board = state.board
+            controlled, occupied = list(board.controlled_rings), board.occupied
+            board.refresh_counters()
+            assert controlled == board.controlled_rings
+            assert occupied == board.occupied
+
+        on_board = sum(c.num_white_rings + c.num_black_rings
+                       for row in board.grid for c in row)
+        removed = board.removed_white_rings + board.removed_black_rings
+        assert on_board + removed == 46
+
+
+def test_custom_board_game():
+    random.seed(1)
+    game = DvonnGame(7, 15)
+    state = game.new_game()
+    assert len(game.get_legal_actions(state)) == 93
+    assert state.players[0].num_player_rings == 45
+    while not game.is_over(state):
+        game.do_action(state, game.sample_random_action(state))
+    assert game.get_result(state) in (0, 1)
+
+
+def test_evaluate(game, new_state, full_state, completed_state):
+    # Nothing on the board yet, so neither player is favoured
+    assert game.evaluate(new_state) == 0.5
+    assert 0 < game.evaluate(full_state) < 1
+    # Black controls more rings
+    assert game.evaluate(completed_state) > 0.5
+
+
+def test_action_ids(game, new_state, full_state):
+    actions = (game.get_legal_actions(new_state) +
+               game.get_legal_actions(full_state))
+    for action in actions:
+        action_id = game.get_action_id(action)
+        assert game.get_action_from_id(action_id) == action
+
+
+def test_pickle_state(game):
+    random.seed(5)
+    state = game.new_game()
+    while not game.is_over(state):
+        copy = pickle.loads(pickle.dumps(state))
+        assert copy.encode() == state.encode()
+        assert copy.board.occupied == state.board.occupied
+        assert copy.board.controlled_rings == state.board.controlled_rings
+        assert (copy.board.removed_white_rings ==
+                state.board.removed_white_rings)
+        assert set(copy.legal_actions) == set(state.legal_actions)
+        assert copy.current_player == state.current_player
+        game.do_action(state, game.sample_random_action(state))
+    copy = pickle.loads(pickle.dumps(state))
+    assert game.is_over(copy)
+    assert copy.current_player == state.current_player
+
+
+def test_deepcopy_state(game, full_state):
+    copy = deepcopy(full_state)
+    action = copy.legal_actions[0]
+    game.do_action(copy, action)
+    assert copy.encode() != full_state.encode()
+    assert action in full_state.legal_actions
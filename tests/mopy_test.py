@@ -0,0 +1,231 @@
+from mopy.mopy import Mopy
+from mopy.cache import SearchCache
+from mopy.mctree import MCTree
+from mopy.impl.nim.game import NimGame
+from mopy.impl.nim.action import NimAction
+from mopy.impl.dvonn.game import DvonnGame
+from mopy.impl.dvonn.prior import dvonn_adjacency
+from mopy.policies import backup, final, selection, simulation
+import gc
+import json
+import pytest
+
+
+@pytest.fixture
+def game(scope="module"):
+    # Taking everything from the only heap left is the only winning action
+    return NimGame([0, 6])
+
+
+def test_search(game):
+    action = Mopy().search(game, game.new_game(), search_time=0.2)
+    assert action == NimAction(1, 6)
+
+
+def test_rave_search(game):
+    mopy = Mopy(sel_policy=selection.RAVE, backup_policy=backup.rave)
+    action = mopy.search(game, game.new_game(), search_time=0.2)
+    assert action == NimAction(1, 6)
+
+
+def test_mast_update(game):
+    mast = simulation.MAST()
+    a, b = NimAction(1, 6), NimAction(1, 1)
+    mast.update(game, [(0, a)], 0)
+    mast.update(game, [(0, b), (1, a)], 0)
+    assert mast.value(game.get_action_id(a)) == 0.5
+    assert mast.value(game.get_action_id(b)) == 1
+    assert mast.value(game.get_action_id(NimAction(1, 2))) == 1
+
+
+def test_mast_weights_follow_updates(game):
+    mast = simulation.MAST(temperature=0.1)
+    state = game.new_game()
+    mast(game, state)
+    # Every action but taking the whole heap loses from now on
+    for a in game.get_legal_actions(state):
+        mast.update(game, [(0, a)], 0 if a == NimAction(1, 6) else 1)
+    assert all(mast(game, state) == NimAction(1, 6) for _ in range(20))
+
+
+@pytest.mark.parametrize("mast", [
+    simulation.MAST(),
+    simulation.MAST(temperature=0.1),
+    simulation.MAST(epsilon=0.2)
+])
+def test_mast_search(game, mast):
+    mopy = Mopy(sim_policy=mast)
+    action = mopy.search(game, game.new_game(), search_time=0.2)
+    assert action == NimAction(1, 6)
+    assert sum(mast.visits.values()) > 0
+
+
+def test_truncated_search():
+    game = DvonnGame()
+    state = game.new_game()
+    mopy = Mopy(rollout_depth=4)
+    action = mopy.search(game, state, search_time=0.2)
+    assert action in game.get_legal_actions(state)
+
+
+def test_default_evaluation(game):
+    # Nim has no evaluation function, so cut off games are played out
+    mopy = Mopy(rollout_depth=1)
+    action = mopy.search(game, game.new_game(), search_time=0.2)
+    assert action == NimAction(1, 6)
+
+
+def test_puct_search():
+    game = DvonnGame()
+    state = game.new_game()
+    mopy = Mopy(sel_policy=selection.PUCT, prior_policy=dvonn_adjacency,
+                rollout_depth=4)
+    action = mopy.search(game, state, search_time=0.2)
+    assert action in game.get_legal_actions(state)
+
+
+def test_widening_search(game):
+    mopy = Mopy(sel_policy=selection.PUCT, widening=(2, 0.5))
+    action = mopy.search(game, game.new_game(), search_time=0.2)
+    assert action == NimAction(1, 6)
+
+
+@pytest.mark.parametrize("sequential_halving", [False, True])
+def test_simulation_budget(game, sequential_halving):
+    root_visits = []
+
+    def counting_backup(node, winner):
+        backup.win_loss_ratio(node, winner)
+        if node.parent is None:
+            root_visits.append(node.total_games)
+
+    mopy = Mopy(backup_policy=counting_backup,
+                sequential_halving=sequential_halving)
+    action = mopy.search(game, game.new_game(), search_time=None,
+                         num_sims=300)
+    assert action == NimAction(1, 6)
+    assert 0 < len(root_visits) <= 300
+
+
+@pytest.mark.parametrize("num_sims", [1, 20, 100])
+def test_halving_exact_budget(num_sims):
+    # More actions than some of the budgets
+    game = NimGame([10, 10, 10])
+    root = MCTree(game, game.new_game())
+    action = Mopy(sequential_halving=True)._halving_search(
+        root, None, num_sims)
+    assert root.total_games <= num_sims
+    # Actions left out of the budget aren't added to the tree at all
+    assert all(c.total_games > 0 for c in root.children)
+    assert action in game.get_legal_actions(game.new_game())
+
+
+def test_halving_time_budget(game):
+    mopy = Mopy(sequential_halving=True)
+    action = mopy.search(game, game.new_game(), search_time=0.2)
+    assert action == NimAction(1, 6)
+
+
+def test_no_budget(game):
+    with pytest.raises(ValueError):
+        Mopy().search(game, game.new_game(), search_time=None)
+
+
+def test_profile(game):
+    mopy = Mopy(profile=True)
+    assert mopy.last_profile is None
+    mopy.search(game, game.new_game(), search_time=None, num_sims=100)
+
+    report = mopy.last_profile.to_dict()
+    json.dumps(report)
+    assert report["counters"]["simulations"] == 100
+    assert report["game_calls"]["get_result"] == 100
+    # Every simulation and expansion copies a state
+    counters = report["counters"]
+    assert counters["deepcopies"] == 100 + counters["nodes_created"]
+    assert 0 < report["max_depth"] <= 6
+    assert all(t >= 0 for t in report["phase_times"].values())
+
+
+def test_profile_counts_every_copy():
+    # Heaps big enough that most rollouts are cut off
+    game = NimGame([3, 4, 5])
+    cache = SearchCache(accumulate=True)
+    mopy = Mopy(profile=True, rollout_depth=1, cache=cache)
+    for _ in range(2):
+        mopy.search(game, game.new_game(), search_time=None, num_sims=50)
+    report = mopy.last_profile.to_dict()
+    counters = report["counters"]
+    # The second search warm starts a child for each of the 12 actions
+    assert counters["deepcopies"] == (
+        50 + counters["nodes_created"] + report["game_calls"]["evaluate"] + 12)
+    assert report["game_calls"]["evaluate"] > 0
+
+
+def test_parallel_profile(game):
+    mopy = Mopy(profile=True)
+    mopy.parallel_search(game, game.new_game(), search_time=None,
+                         num_sims=100, num_workers=2)
+    report = mopy.last_profile.to_dict()
+    assert report["num_workers"] == 2
+    assert report["counters"]["simulations"] == 100
+    assert report["wall_time"] > 0
+
+
+def test_profile_disabled(game):
+    mopy = Mopy()
+    mopy.search(game, game.new_game(), search_time=None, num_sims=10)
+    assert mopy.last_profile is None
+
+
+def test_search_result(game):
+    result = Mopy().search(game, game.new_game(), search_time=None,
+                           num_sims=200, return_result=True)
+    assert result.action == NimAction(1, 6)
+    assert result.total_simulations == 200
+    assert sum(c.visits for c in result.children) == 200
+    assert result.children[0].visits >= result.children[-1].visits
+    assert result.principal_variation[0] == result.children[0].action
+    assert 0 < result.mean_depth <= result.max_depth <= 6
+    assert result.num_nodes > len(result.children)
+    assert result.sims_per_second > 0
+    assert result.workers == []
+    json.dumps(result.to_dict())
+
+
+def test_parallel_search_result(game):
+    result = Mopy().parallel_search(game, game.new_game(), search_time=None,
+                                    num_sims=200, num_workers=2,
+                                    return_result=True)
+    assert result.action == NimAction(1, 6)
+    assert len(result.workers) == 2
+    assert result.total_simulations == 200
+    assert sum(c.visits for c in result.children) == 200
+    assert result.max_depth == max(w.max_depth for w in result.workers)
+
+
+@pytest.mark.parametrize("final_policy", [
+    final.max_ratio, final.max_visits, final.robust_max
+])
+def test_final_policies(game, final_policy):
+    mopy = Mopy(final_policy=final_policy)
+    action = mopy.search(game, game.new_game(), search_time=None,
+                         num_sims=200)
+    assert action == NimAction(1, 6)
+
+
+@pytest.mark.parametrize("gc_mode", ["pause", "freeze"])
+def test_gc_mode(game, gc_mode):
+    mopy = Mopy(gc_mode=gc_mode)
+    try:
+        action = mopy.search(game, game.new_game(), search_time=0.2)
+        assert action == NimAction(1, 6)
+        assert gc.isenabled()
+        assert (gc.get_freeze_count() > 0) == (gc_mode == "freeze")
+    finally:
+        gc.unfreeze()
+
+
+def test_unknown_gc_mode():
+    with pytest.raises(ValueError):
+        Mopy(gc_mode="off")
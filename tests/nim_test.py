@@ -1,6 +1,7 @@
 from mopy.impl.nim.state import NimState
 from mopy.impl.nim.action import NimAction
 from mopy.impl.nim.game import NimGame
+import pickle
 import pytest
 
 
@@ -79,3 +80,60 @@ def test_game_over(game, new_state, mid_state, completed_state):
         game.get_result(mid_state)
     with pytest.raises(Exception):
         game.get_result(new_state)
+
+
+def test_configured_heaps():
+    game = NimGame([1, 0, 7, 2])
+    state = game.new_game()
+    assert state.heaps == [1, 0, 7, 2]
+    assert state.remaining == 10
+
+    game.do_action(state, NimAction(2, 7))
+    assert state.remaining == 3
+    assert game.new_game().heaps == [1, 0, 7, 2]
+
+
+def test_find_heap(mid_state):
+    # Elements are counted left to right, skipping empty heaps
+    assert mid_state.find_heap(0) == (0, 0)
+    assert mid_state.find_heap(1) == (0, 1)
+    assert mid_state.find_heap(2) == (2, 0)
+
+
+def test_sample_random_action(game, mid_state):
+    legal_actions = game.get_legal_actions(mid_state)
+    sampled = set()
+    for _ in range(200):
+        a = game.sample_random_action(mid_state)
+        assert a in legal_actions
+        sampled.add(a)
+    assert len(sampled) == len(legal_actions)
+
+
+def test_running_total(game):
+    state = NimGame([5] * 50).new_game()
+    while not game.is_over(state):
+        game.do_action(state, game.sample_random_action(state))
+        assert state.remaining == sum(state.heaps)
+    assert all(h == 0 for h in state.heaps)
+
+
+def test_action_ids(game, new_state):
+    for action in game.get_legal_actions(new_state):
+        action_id = game.get_action_id(action)
+        assert game.get_action_from_id(action_id) == action
+
+
+def test_pickle_state(game, mid_state):
+    copy = pickle.loads(pickle.dumps(mid_state))
+    assert copy.heaps == mid_state.heaps
+    assert copy.current_player == mid_state.current_player
+    assert copy.remaining == 3
+    assert [copy.find_heap(k) for k in range(3)] == [(0, 0), (0, 1), (2, 0)]
+
+
+def test_pickle_huge_heaps():
+    state = NimGame([2**40, 3]).new_game()
+    copy = pickle.loads(pickle.dumps(state))
+    assert copy.heaps == [2**40, 3]
+    assert copy.remaining == 2**40 + 3
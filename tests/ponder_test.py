@@ -0,0 +1,103 @@
+from mopy.mopy import Mopy
+from mopy.mctree import MCTree
+from mopy.impl.nim.game import NimGame
+from mopy.impl.dvonn.game import DvonnGame
+from mopy.impl.dvonn.action import DvonnAction
+from copy import deepcopy
+from operator import attrgetter
+from time import sleep
+import pickle
+import pytest
+
+
+@pytest.fixture
+def game():
+    return NimGame([3, 4, 5])
+
+
+def play(game, state, action):
+    game.do_action(state, action)
+    return state
+
+
+def test_ponder_hit(game):
+    mopy = Mopy(ponder=True)
+    state = game.new_game()
+    play(game, state, mopy.search(game, state, None, num_sims=200))
+    sleep(0.2)
+    ponder_root = mopy._ponder_root
+    reply = max(list(ponder_root.children),
+                key=attrgetter("total_games")).action
+    play(game, state, reply)
+    result = mopy.search(game, state, None, num_sims=50,
+                         return_result=True)
+    assert result.total_simulations > 50
+    mopy.stop_pondering()
+
+
+def test_ponder_hit_up_to_symmetry():
+    game = DvonnGame()
+    state = game.new_game()
+    # The centre is fixed by every symmetry, so replies have mirror images
+    game.do_action(state, DvonnAction(DvonnAction.Type.PLACE, (2, 5)))
+    mopy = Mopy()
+    root = MCTree(game, deepcopy(state))
+    mopy._run_search(root, None, 300)
+    mopy._ponder_root = root
+
+    tried = {c.action: c for c in root.children}
+    keys = {game.get_canonical_key(c.state)[0]: c for c in root.children}
+    for reply in game.get_legal_actions(state):
+        reply_state = deepcopy(state)
+        game.do_action(reply_state, reply)
+        child = keys[game.get_canonical_key(reply_state)[0]]
+        if reply not in tried:
+            break
+    new_root = mopy._take_ponder_root(game, reply_state)
+    assert new_root.total_games == child.total_games
+    assert len(new_root.children) == len(child.children)
+    for c in new_root.children:
+        assert c.action in game.get_legal_actions(reply_state)
+        expected = deepcopy(reply_state)
+        game.do_action(expected, c.action)
+        assert c.state.encode() == expected.encode()
+
+
+def test_ponder_miss(game):
+    mopy = Mopy(ponder=True)
+    state = game.new_game()
+    play(game, state, mopy.search(game, state, None, num_sims=200))
+    mopy.stop_pondering()
+    assert mopy._ponder_thread is None
+    # Nothing is reused once we stopped pondering
+    play(game, state, game.get_legal_actions(state)[0])
+    result = mopy.search(game, state, None, num_sims=50,
+                         return_result=True)
+    assert result.total_simulations == 50
+    mopy.stop_pondering()
+
+
+def test_ponder_budget(game):
+    mopy = Mopy(ponder=True, ponder_sims=100)
+    state = game.new_game()
+    mopy.search(game, state, None, num_sims=200)
+    ponder_root, thread = mopy._ponder_root, mopy._ponder_thread
+    start_games = ponder_root.total_games
+    thread.join(5)
+    assert not thread.is_alive()
+    assert ponder_root.total_games - start_games <= 100
+    mopy.stop_pondering()
+
+
+def test_ponder_needs_budget():
+    with pytest.raises(ValueError):
+        Mopy(ponder=True, ponder_time=None)
+
+
+def test_pickle_while_pondering():
+    game = NimGame([0, 6, 2])
+    mopy = Mopy(ponder=True)
+    mopy.search(game, game.new_game(), None, num_sims=50)
+    copy = pickle.loads(pickle.dumps(mopy))
+    assert copy._ponder_thread is None
+    mopy.stop_pondering()
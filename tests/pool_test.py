@@ -0,0 +1,25 @@
+from mopy.mopy import Mopy
+from mopy.pool import SearchPool
+from mopy.impl.nim.game import NimGame
+from mopy.impl.nim.action import NimAction
+
+
+def test_search_many():
+    game = NimGame([0, 6])
+    states = [game.new_game() for _ in range(6)]
+    results = list(Mopy().search_many(game, states, search_time=None,
+                                      num_sims=300, num_workers=2))
+    assert sorted(i for i, _ in results) == list(range(6))
+    assert all(a == NimAction(1, 6) for _, a in results)
+
+
+def test_persistent_pool():
+    game = NimGame([2, 0, 3])
+    with SearchPool(Mopy(), game, num_workers=2) as pool:
+        for _ in range(2):
+            states = (game.new_game() for _ in range(4))
+            results = dict(pool.search_many(
+                states, search_time=None, num_sims=100, return_result=True))
+            assert len(results) == 4
+            assert all(r.total_simulations == 100
+                       for r in results.values())
@@ -0,0 +1,97 @@
+from mopy.mopy import Mopy
+from mopy.game import Game
+from mopy.mctree import MCTree
+from mopy.impl.nim.game import NimGame
+from mopy.policies import selection
+from mopy import serialization
+import pytest
+
+
+class NoIdNimGame(NimGame):
+    """Nim without a way to map action ids back to actions."""
+
+    get_action_from_id = Game.get_action_from_id
+
+
+@pytest.fixture
+def game():
+    return NimGame([2, 3, 4])
+
+
+@pytest.fixture
+def tree(game):
+    root = MCTree(game, game.new_game())
+    mopy = Mopy()
+    for _ in range(300):
+        mopy._run_simulation(root)
+    return root
+
+
+def walk(node):
+    """Yield (depth, node) of a tree in a fixed order."""
+    stack = [(0, node)]
+    while stack:
+        depth, node = stack.pop()
+        yield depth, node
+        children = sorted(node.children, key=lambda c: (
+            c.action.heap_num, c.action.num_taken))
+        stack.extend((depth + 1, c) for c in children)
+
+
+def test_round_trip(game, tree):
+    loaded = serialization.loads(
+        serialization.dumps(tree), game, game.new_game())
+    pairs = list(zip(walk(tree), walk(loaded)))
+    assert len(pairs) == len(list(walk(tree)))
+    for (_, a), (_, b) in pairs:
+        assert a.action == b.action
+        assert a.won_games == b.won_games
+        assert a.total_games == b.total_games
+        assert a.state.heaps == b.state.heaps
+        assert a.state.current_player == b.state.current_player
+    # The loaded tree can be searched further
+    Mopy()._run_simulation(loaded)
+
+
+def test_max_depth(game, tree):
+    data = serialization.dumps(tree, max_depth=1)
+    with serialization.CompactTree(data, game) as compact:
+        assert compact.num_nodes == 1 + len(tree.children)
+        assert all(not c.children for c in compact.root.children)
+
+
+def test_memory_mapped(game, tree, tmp_path):
+    path = str(tmp_path / "tree.mopy")
+    serialization.save(tree, path)
+    with serialization.CompactTree.open(path, game) as compact:
+        root = compact.root
+        assert root.action is None
+        assert root.total_games == tree.total_games
+        best = max(tree.children, key=lambda c: c.total_games)
+        node = root.find_child(game.get_action_id(best.action))
+        assert node.action == best.action
+        assert node.win_ratio == pytest.approx(best.win_ratio)
+        assert len(node.children) == len(best.children)
+        assert root.find_child(-5) is None
+
+
+def test_bad_data():
+    with pytest.raises(ValueError):
+        serialization.CompactTree(b"\0" * 64)
+
+
+def test_parallel_search_result(game):
+    mopy = Mopy(sel_policy=selection.UCT)
+    result = mopy.parallel_search(
+        game, game.new_game(), search_time=None, num_sims=200,
+        num_workers=2, return_result=True)
+    assert sum(c.visits for c in result.children) == 200
+
+
+def test_parallel_search_without_action_ids():
+    game = NoIdNimGame([2, 3, 4])
+    result = Mopy().parallel_search(
+        game, game.new_game(), search_time=None, num_sims=200,
+        num_workers=2, return_result=True)
+    assert sum(c.visits for c in result.children) == 200
+    assert result.action in game.get_legal_actions(game.new_game())
@@ -1,7 +1,13 @@
 from mopy.mctree import MCTree
 from mopy.impl.nim.game import NimGame
+from mopy.impl.nim.action import NimAction
+from mopy.policies import backup, selection, simulation
 from copy import deepcopy
+from math import ceil
+import gc
+import pickle
 import pytest
+import weakref
 
 
 @pytest.fixture
@@ -84,3 +90,126 @@ def test_win_ratio_combine(root_left, root_right, root):
         assert int(c.win_ratio) == 1
     for c in root_left.children[mid:]:
         assert c.win_ratio == 0.5
+
+
+def test_simulation_trace(game):
+    s = game.new_game()
+    r = MCTree(game, s)
+    trace = []
+    winner = r.simulate_game(simulation.random_action, trace)
+    assert sum(a.num_taken for _, a in trace) == 12
+    # Players alternate in Nim, and the last player to move wins
+    assert [p for p, _ in trace] == [i % 2 for i in range(len(trace))]
+    assert trace[-1][0] == winner
+
+
+def test_rave_backup(game, root):
+    child = next(c for c in root.children if c.action == NimAction(0, 3))
+    sibling = next(c for c in root.children if c.action == NimAction(2, 5))
+    grandchild = MCTree(game, deepcopy(child.state), NimAction(1, 4), child)
+    child.children.append(grandchild)
+    root.children = [child, sibling]
+    child.parent = sibling.parent = root
+
+    # Player 0 takes heap 0, player 1 heap 1, player 0 heap 2 and wins
+    grandchild.backup_result(0, backup.rave, [(0, NimAction(2, 5))])
+    assert root.total_games == 1 and child.won_games == 1
+    assert child.amaf_total_games == 1 and child.amaf_won_games == 1
+    assert sibling.amaf_total_games == 1 and sibling.amaf_won_games == 1
+    assert grandchild.amaf_total_games == 1
+    assert grandchild.amaf_won_games == 0
+
+    # Player 1 takes heap 2 this time, so the sibling isn't updated
+    grandchild.backup_result(1, backup.rave, [(1, NimAction(2, 5))])
+    assert child.amaf_total_games == 2 and child.amaf_won_games == 1
+    assert sibling.amaf_total_games == 1
+    assert grandchild.amaf_won_games == 1
+
+
+def test_fractional_backup(game, root):
+    child = root.children[0]
+    child.parent = root
+    child.backup_result(0.25, backup.win_loss_ratio)
+    # Player 1 moves at child, so player 0 wins from child with 0.75 chance
+    assert child.won_games == 0.75
+    assert root.won_games == 0.25
+    assert root.total_games == child.total_games == 1
+
+
+def test_multiplayer_backup(game, root):
+    child = root.children[0]
+    child.parent = root
+    # A third player (2) wins, so neither player to move did
+    child.backup_result(2, backup.win_loss_ratio)
+    assert child.won_games == root.won_games == 1
+    assert backup.win_share(2, 0) == backup.win_share(2, 1) == 0
+    assert backup.win_share(2, 2) == 1
+
+
+def test_prior_expansion_order(game):
+    def prefer_small(game, state, actions):
+        return [1 / a.num_taken for a in actions]
+
+    r = MCTree(game, game.new_game())
+    first = r.select(selection.UCT, prefer_small)
+    assert first.action.num_taken == 1
+    assert sum(r.untried_priors) + first.prior == pytest.approx(1)
+    assert r.untried_priors == sorted(r.untried_priors)
+
+    # Children of the new node get their own priors
+    child = first.select(selection.UCT, prefer_small)
+    assert child.parent is first and child.prior is not None
+
+
+def test_puct_follows_priors(game, root):
+    for c in root.children:
+        c.total_games, c.won_games = 1, 0.5
+        c.prior = 0.01
+        c.parent = root
+    root.total_games = len(root.children)
+    root.children[3].prior = 0.9
+    assert selection.PUCT(root) is root.children[3]
+
+
+def test_progressive_widening(game):
+    r = MCTree(game, game.new_game())
+    widening = (1, 0.5)
+    for _ in range(100):
+        leaf = r.select(selection.UCT, widening=widening)
+        leaf.backup_result(leaf.simulate_game(simulation.random_action),
+                           backup.win_loss_ratio)
+        # Children only grow with the square root of visits before expanding
+        visits_before = r.total_games - 1
+        assert 1 <= len(r.children) <= max(1, ceil(visits_before**0.5))
+    assert len(r.children) == 10
+    assert r.untried_actions
+
+
+def test_weak_parents(game):
+    root = MCTree(game, game.new_game())
+    for _ in range(50):
+        root.select(selection.UCT).backup_result(0, backup.win_loss_ratio)
+    leaf = root
+    while leaf.children:
+        leaf = leaf.children[0]
+    assert leaf.parent is not None
+
+    leaf_ref = weakref.ref(leaf)
+    del leaf
+    gc.disable()
+    try:
+        # Refcounting alone frees the tree once the root is gone
+        del root
+        assert leaf_ref() is None
+    finally:
+        gc.enable()
+
+
+def test_pickle_restores_parents(game):
+    root = MCTree(game, game.new_game())
+    for _ in range(20):
+        root.select(selection.UCT).backup_result(1, backup.win_loss_ratio)
+    copy = pickle.loads(pickle.dumps(root))
+    assert copy.parent is None
+    assert all(c.parent is copy for c in copy.children)
+    assert copy.total_games == root.total_games